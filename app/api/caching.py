@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def export_etag(hash_value: str, kind: str, params: dict[str, Any]) -> str:
+    payload = json.dumps({"kind": kind, "params": params}, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(hash_value.encode("utf-8"))
+    hasher.update(payload)
+    return f'"{hasher.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        # If-None-Match uses weak comparison, so a W/ prefix still matches.
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def accepts_encoding(accept_encoding: Optional[str], coding: str) -> bool:
+    """Whether an Accept-Encoding header allows ``coding``, honouring q-values and ``*``."""
+    if not accept_encoding:
+        return False
+    explicit = wildcard = None
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name == coding:
+            explicit = quality
+        elif name == "*":
+            wildcard = quality
+    chosen = explicit if explicit is not None else wildcard
+    return chosen is not None and chosen > 0
+
+
+async def conditional_response(
+    request: Request,
+    etag: str,
+    build: Callable[[], Awaitable[Response]],
+    cache_control: str = IMMUTABLE_CACHE_CONTROL,
+    vary: Optional[str] = None,
+) -> Response:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if vary is not None:
+        # Sent on 304s too, so caches keep one entry per representation.
+        headers["Vary"] = vary
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response = await build()
+    response.headers.update(headers)
+    return response
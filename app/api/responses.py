@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import base64
+import json
+from typing import Any, Iterable, Optional
+
+RESPONSE_FIELDS = (
+    "grid_w",
+    "grid_h",
+    "grid",
+    "grid_spaced",
+    "preview_url",
+    "preview_png_base64",
+    "hash",
+    "warnings",
+)
+DEFAULT_RESPONSE_FIELDS = RESPONSE_FIELDS
+# The inline base64 preview is encoded on first request and kept beside the stored body.
+STORED_RESPONSE_FIELDS = tuple(field for field in RESPONSE_FIELDS if field != "preview_png_base64")
+
+
+def serialize_response(
+    hash_value: str,
+    grid_w: int,
+    grid_h: int,
+    grid: Optional[list[str]],
+    grid_spaced: Optional[list[str]],
+    has_preview: bool,
+    warnings: list[str],
+) -> tuple[bytes, dict[str, tuple[int, int]]]:
+    """Encode the stored members once, recording where each member sits in the body."""
+    values: dict[str, Any] = {
+        "grid_w": grid_w,
+        "grid_h": grid_h,
+        "grid": grid,
+        "grid_spaced": grid_spaced,
+        "preview_url": f"/api/preview/{hash_value}" if has_preview else None,
+        "hash": hash_value,
+        "warnings": warnings,
+    }
+    parts: list[bytes] = []
+    spans: dict[str, tuple[int, int]] = {}
+    offset = 1
+    for name in STORED_RESPONSE_FIELDS:
+        member = encode_member(name, values[name])
+        spans[name] = (offset, offset + len(member))
+        parts.append(member)
+        offset += len(member) + 1
+    return b"{" + b",".join(parts) + b"}", spans
+
+
+def assemble_body(
+    body: bytes,
+    spans: dict[str, tuple[int, int]],
+    fields: Iterable[str],
+    extra: Optional[dict[str, bytes]] = None,
+) -> bytes:
+    view = memoryview(body)
+    members = []
+    for name in fields:
+        if extra is not None and name in extra:
+            members.append(extra[name])
+        else:
+            start, end = spans[name]
+            members.append(view[start:end])
+    return b"{" + b",".join(members) + b"}"
+
+
+def encode_preview_member(preview_png: Optional[bytes]) -> bytes:
+    preview_b64 = base64.b64encode(preview_png).decode("ascii") if preview_png is not None else None
+    return encode_member("preview_png_base64", preview_b64)
+
+
+def parse_fields(raw: Optional[str]) -> tuple[str, ...]:
+    if raw is None:
+        return DEFAULT_RESPONSE_FIELDS
+    requested = [name.strip() for name in raw.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in RESPONSE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown response fields: {', '.join(unknown)}")
+    # Keep the canonical order so equivalent requests yield identical bodies.
+    return tuple(name for name in RESPONSE_FIELDS if name in requested)
+
+
+def encode_member(name: str, value: Any) -> bytes:
+    return json.dumps({name: value}, ensure_ascii=False, separators=(",", ":"))[1:-1].encode("utf-8")
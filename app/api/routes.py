@@ -1,46 +1,154 @@
 from __future__ import annotations
 
-import base64
+import functools
+import gzip
+import hashlib
+import hmac
 import io
 import json
+import multiprocessing
 import random
-from typing import Any, Optional
-
-from fastapi import APIRouter, File, Form, HTTPException, UploadFile
-from fastapi.responses import Response
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from threading import Lock
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Iterator, Optional
+
+import numpy as np
+from fastapi import APIRouter, File, Form, HTTPException, Query, Request, UploadFile
+from fastapi import Path as FastAPIPath
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from PIL import Image
 
-from app.api.schemas import CropPayload, SettingsPayload
-from app.core.cache import ConversionCache, ConversionResult, EmojiImageCache, FeatureMemoCache
-from app.core.dataset import load_dataset
+from app.api.caching import IMMUTABLE_CACHE_CONTROL, accepts_encoding, conditional_response, export_etag
+from app.api.responses import (
+    STORED_RESPONSE_FIELDS,
+    assemble_body,
+    encode_preview_member,
+    parse_fields,
+    serialize_response,
+)
+from app.api.schemas import AnimationPayload, CropPayload, DatasetSwitchPayload, MatchPayload, SettingsPayload
+from app.api.streaming import AdmittedStreamingResponse
+from app.api.uploads import ingest_upload, open_image
+from app.core.admission import AdmissionController, AdmissionRejected, estimate_cost
+from app.core.animation import AnimationFrame, iter_frames, match_frames
+from app.core.atlas import SpriteAtlas, atlas_filename, build_atlas
+from app.core.bundle import BUNDLE_FORMAT, encode_bundle
+from app.core.cache import (
+    ConversionCache,
+    ConversionResult,
+    EmojiImageCache,
+    FeatureMemoCache,
+    pack_indices,
+    text_rows,
+)
+from app.core.config import load_config
+from app.core.dataset import EmojiDataset, load_dataset
 from app.core.dithering import apply_dithering
-from app.core.features import compute_grid_features
-from app.core.hashing import deterministic_seed, stable_hash
+from app.core.features import compute_grid_features, vectors_to_features
+from app.core.hashing import ContentKey
 from app.core.matcher import MatchWeights, match_features
-from app.core.preprocess import compute_grid_size
-from app.core.render import RenderSettings, render_mosaic
+from app.core.preprocess import GridResult, compute_grid_size
+from app.core.profiling import PSTATS_FILE, TIMELINE_FILE, profile_path, profile_request, profiled_call, stage
+from app.core.registry import DatasetRegistry, available_versions
+from app.core.render import (
+    RenderSettings,
+    render_animation,
+    render_mosaic,
+    render_mosaic_from_atlas,
+    stream_mosaic_png,
+    stream_mosaic_svg,
+)
+from app.core.shared import open_mapped_array
+from app.core.tiling import init_tile_worker, match_tiled
+from app.core.warmup import Readiness, WarmupStep
 
 router = APIRouter(prefix="/api")
 
-DATASET_VERSION = "v1"
-DATASET = load_dataset(DATASET_VERSION)
+CONFIG = load_config()
+DATASETS = DatasetRegistry(
+    default_version=CONFIG.dataset_version,
+    max_resident=CONFIG.max_resident_datasets,
+    loader=lambda version: load_dataset(version, mmap=True),
+    on_evict=lambda version: _drop_dataset_state(version),
+)
 CONVERSION_CACHE = ConversionCache(max_size=128)
 EMOJI_IMAGE_CACHE = EmojiImageCache(max_size=1024)
-FEATURE_MEMO_CACHE = FeatureMemoCache(max_size=4096)
+FEATURE_MEMO_CACHES: dict[str, FeatureMemoCache] = {}
+EXPORT_CELL_SIZE = 48
+ANIMATION_CONTENT_TYPES = {"image/gif", "image/png", "image/apng", "image/webp"}
+STANDARD_MAX_DIM = 120
+SPRITE_ATLASES: dict[tuple[str, int], SpriteAtlas] = {}
+CLIENT_BUNDLES: dict[tuple[str, bool], bytes] = {}
+CLIENT_BUNDLE_DIGESTS: dict[str, str] = {}
+DATASET_STATE_LOCK = Lock()
+ATLAS_BUILD_LOCK = Lock()
+TILE_EXECUTOR: Optional[ProcessPoolExecutor] = None
+TILE_EXECUTOR_LOCK = Lock()
+PREVIEW_CELL_SIZE = 10
+# Accepted (low, high) per component. Sobel edge magnitudes on 0-1 luma top out at 4 * sqrt(2).
+_LAB_RANGE = ((0.0, 100.0), (-128.0, 128.0), (-128.0, 128.0))
+MATCH_VECTOR_RANGES = {
+    "rgb": ((0.0, 255.0),) * 3,
+    "lab": _LAB_RANGE,
+    "features": _LAB_RANGE + ((0.0, 4 * 2 ** 0.5), (0.0, 1.0)),
+}
+# Batches up to this size match on the event loop; the thread hop would cost more than the work.
+INLINE_MATCH_VECTORS = 64
+ADMISSION = AdmissionController(
+    budget=CONFIG.admission_budget,
+    max_wait=CONFIG.admission_max_wait,
+    max_queue=CONFIG.admission_max_queue,
+)
+
+READINESS = Readiness()
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+Endpoint = Callable[..., Awaitable[Response]]
+
+
+def _profiled(endpoint: Endpoint) -> Endpoint:
+    """Profile requests carrying the profiling token; the endpoint is returned as is when disabled."""
+    if not CONFIG.profiling_enabled:
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args: Any, **kwargs: Any) -> Response:
+        request: Request = kwargs["request"]
+        if not _is_profiling_admin(request):
+            return await endpoint(*args, **kwargs)
+        label = f"{request.method} {request.url.path}"
+        with profile_request(CONFIG.profile_dir, label, CONFIG.profile_keep) as profile:
+            response = await endpoint(*args, **kwargs)
+        if profile is not None:
+            response.headers[PROFILE_ID_HEADER] = profile.request_id
+        return response
+
+    return wrapper
 
 
 @router.post("/convert")
+@_profiled
 async def convert_image(
+    request: Request,
     file: UploadFile = File(...),
     crop: Optional[str] = Form(None),
     settings: Optional[str] = Form(None),
-) -> dict[str, Any]:
+    fields: Optional[str] = Query(None),
+) -> Response:
+    try:
+        response_fields = parse_fields(fields)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
     if file.content_type not in {"image/png", "image/jpeg"}:
         raise HTTPException(status_code=400, detail="Only PNG and JPEG files are supported.")
 
-    image_bytes = await file.read()
-    if not image_bytes:
-        raise HTTPException(status_code=400, detail="Empty upload.")
+    with stage("ingest"):
+        upload = await ingest_upload(file, CONFIG.max_upload_bytes)
 
     try:
         settings_data = json.loads(settings) if settings else {}
@@ -51,122 +159,560 @@ async def convert_image(
     settings_payload = SettingsPayload.from_json(settings_data)
     crop_payload = CropPayload.model_validate(crop_data) if crop_data else CropPayload()
 
-    image_hash = stable_hash(
-        image_bytes,
-        crop_payload.model_dump(),
-        settings_payload.model_dump(),
-        DATASET.version,
-    )
+    # Resolve the default once so a concurrent swap cannot mix versions within a request.
+    dataset = DATASETS.get()
+    key = upload.hasher.finalize(crop_payload.model_dump(), settings_payload.model_dump(), dataset.version)
 
-    cached = CONVERSION_CACHE.get(image_hash)
+    cached = CONVERSION_CACHE.get(key.hash)
     if cached is not None:
-        return _response_from_cache(image_hash, cached)
+        return _response_from_cache(cached, response_fields)
 
-    try:
-        image = Image.open(io.BytesIO(image_bytes))
-    except Exception as exc:  # noqa: BLE001
-        raise HTTPException(status_code=400, detail="Unable to decode image.") from exc
-
-    image = image.convert("RGBA")
+    image = open_image(upload.stream, CONFIG.max_image_pixels)
     width, height = image.size
 
     warnings: list[str] = []
-    crop_x, crop_y, crop_w, crop_h = _normalize_crop(crop_payload, width, height, warnings)
-    cropped = image.crop((crop_x, crop_y, crop_x + crop_w, crop_y + crop_h))
-
+    crop_box = _normalize_crop(crop_payload, width, height, warnings)
     grid_result = compute_grid_size(
-        crop_w,
-        crop_h,
+        crop_box[2],
+        crop_box[3],
         settings_payload.max_dim,
         settings_payload.grid_w,
         settings_payload.grid_h,
         settings_payload.lock_aspect,
+        hard_cap=CONFIG.large_grid_max_dim if settings_payload.large_grid else STANDARD_MAX_DIM,
     )
     warnings.extend(grid_result.warnings)
 
-    cell_features, _, _, _ = compute_grid_features(cropped, grid_result.grid_w, grid_result.grid_h)
+    cost = estimate_cost(grid_result.grid_w * grid_result.grid_h, width * height, PREVIEW_CELL_SIZE)
+    async with _admitted(cost):
+        result = await run_in_threadpool(
+            profiled_call,
+            _run_conversion,
+            dataset,
+            image,
+            key,
+            settings_payload,
+            crop_box,
+            grid_result,
+            warnings,
+        )
+    CONVERSION_CACHE.set(key.hash, result)
+
+    return _response_from_cache(result, response_fields)
 
-    if settings_payload.dithering:
-        warnings.append("Dithering is not yet implemented; using direct matching.")
-        cell_features = apply_dithering(cell_features)
+
+@router.post("/convert/animation")
+async def convert_animation(
+    file: UploadFile = File(...),
+    crop: Optional[str] = Form(None),
+    settings: Optional[str] = Form(None),
+    animation: Optional[str] = Form(None),
+) -> Response:
+    if file.content_type not in ANIMATION_CONTENT_TYPES:
+        raise HTTPException(status_code=400, detail="Only GIF, APNG and WebP animations are supported.")
+
+    upload = await ingest_upload(file, CONFIG.max_upload_bytes)
+
+    try:
+        settings_data = json.loads(settings) if settings else {}
+        crop_data = json.loads(crop) if crop else {}
+        animation_data = json.loads(animation) if animation else {}
+    except json.JSONDecodeError as exc:
+        raise HTTPException(status_code=400, detail="Invalid JSON payload.") from exc
+
+    settings_payload = SettingsPayload.from_json(settings_data)
+    crop_payload = CropPayload.model_validate(crop_data) if crop_data else CropPayload()
+    animation_payload = AnimationPayload.model_validate(animation_data)
+    dataset = DATASETS.get()
+
+    # Frames are decoded lazily while the response streams, after the spooled upload has
+    # been closed, so animations keep their own (size-limited) copy of the bytes.
+    image = open_image(io.BytesIO(upload.stream.read()), CONFIG.max_image_pixels)
+    width, height = image.size
+    crop_x, crop_y, crop_w, crop_h = _normalize_crop(crop_payload, width, height, [])
+    grid_result = compute_grid_size(
+        crop_w,
+        crop_h,
+        settings_payload.max_dim,
+        settings_payload.grid_w,
+        settings_payload.grid_h,
+        settings_payload.lock_aspect,
+    )
 
     rng = None
     if settings_payload.deterministic:
-        seed = deterministic_seed(
-            image_bytes,
+        key = upload.hasher.finalize(
             crop_payload.model_dump(),
-            settings_payload.model_dump(),
-            DATASET.version,
+            {**settings_payload.model_dump(), "animation": animation_payload.model_dump()},
+            dataset.version,
         )
-        rng = random.Random(seed)
-
-    weights = MatchWeights(
-        color=settings_payload.weights.color,
-        edge=settings_payload.weights.edge,
-        alpha=settings_payload.weights.alpha,
+        rng = random.Random(key.seed)
+
+    frames = match_frames(
+        iter_frames(image, (crop_x, crop_y, crop_x + crop_w, crop_y + crop_h), animation_payload.max_frames),
+        grid_result.grid_w,
+        grid_result.grid_h,
+        dataset.features,
+        MatchWeights(
+            color=settings_payload.weights.color,
+            edge=settings_payload.weights.edge,
+            alpha=settings_payload.weights.alpha,
+            metric=settings_payload.metric,
+        ),
+        settings_payload.deterministic,
+        animation_payload.rematch_threshold,
+        rng=rng,
+        memo_cache=_memo_cache(dataset.version),
     )
 
-    indices = match_features(
+    frame_count = min(getattr(image, "n_frames", 1), animation_payload.max_frames)
+    cells = grid_result.grid_w * grid_result.grid_h * frame_count
+    pixels = width * height * frame_count
+
+    if animation_payload.output == "text":
+        release = await _acquire(estimate_cost(cells, pixels))
+        headers = {"Content-Disposition": "attachment; filename=emoji-art-frames.txt"}
+        return AdmittedStreamingResponse(
+            _stream_frame_text(frames, dataset.emoji_list),
+            release,
+            media_type="text/plain; charset=utf-8",
+            headers=headers,
+        )
+
+    canvas_pixels = grid_result.grid_w * grid_result.grid_h * animation_payload.cell_size ** 2
+    if canvas_pixels * frame_count > CONFIG.max_animation_pixels:
+        raise HTTPException(
+            status_code=413,
+            detail="Animation is too large to render; lower cell_size, max_frames or the grid size.",
+        )
+    render_settings = RenderSettings(
+        cell_size=animation_payload.cell_size,
+        bg_mode=settings_payload.bg_mode,
+        bg_color=settings_payload.bg_color,
+    )
+    async with _admitted(estimate_cost(cells, pixels, animation_payload.cell_size)):
+        data = await run_in_threadpool(
+            render_animation,
+            ((frame.indices, frame.duration) for frame in frames),
+            dataset.asset_paths,
+            render_settings,
+            EMOJI_IMAGE_CACHE,
+            animation_payload.output,
+        )
+    if animation_payload.output == "gif":
+        media_type, filename = "image/gif", "emoji-art.gif"
+    else:
+        media_type, filename = "image/apng", "emoji-art.png"
+    headers = {"Content-Disposition": f"attachment; filename={filename}"}
+    return Response(content=data, media_type=media_type, headers=headers)
+
+
+@router.post("/match")
+async def match_vectors(payload: MatchPayload) -> Response:
+    if payload.emoji_set not in (None, "full"):
+        raise HTTPException(status_code=400, detail=f"Unknown emoji set: {payload.emoji_set}")
+    ranges = MATCH_VECTOR_RANGES[payload.space]
+    if any(len(vector) != len(ranges) for vector in payload.vectors):
+        raise HTTPException(status_code=400, detail=f"Every {payload.space} vector needs {len(ranges)} values.")
+    vectors = np.array(payload.vectors, dtype=np.float64)
+    low, high = np.array(ranges).T
+    # Written so NaN fails too; out-of-range values would overflow the distance sums.
+    if not ((vectors >= low) & (vectors <= high)).all():
+        bounds = ", ".join(f"[{lo:g}, {hi:g}]" for lo, hi in ranges)
+        raise HTTPException(status_code=400, detail=f"{payload.space} vectors must lie within {bounds}.")
+    cell_features = vectors_to_features(vectors, payload.space)
+
+    dataset = DATASETS.get()
+    match = functools.partial(
+        match_features,
         cell_features,
-        DATASET.features,
-        weights,
-        settings_payload.deterministic,
-        rng=rng,
-        memo_cache=FEATURE_MEMO_CACHE,
+        dataset.features,
+        MatchWeights(
+            color=payload.weights.color,
+            edge=payload.weights.edge,
+            alpha=payload.weights.alpha,
+            metric=payload.metric,
+        ),
+        deterministic=False,
+        memo_cache=_memo_cache(dataset.version),
     )
+    if len(cell_features) <= INLINE_MATCH_VECTORS:
+        indices = match()
+    else:
+        async with _admitted(estimate_cost(len(cell_features))):
+            indices = await run_in_threadpool(match)
 
-    grid = _indices_to_grid(indices, DATASET.emoji_list, grid_result.grid_w, grid_result.grid_h)
-    grid_spaced = [" ".join(row) for row in grid]
+    body: dict[str, Any] = {"version": dataset.version}
+    if payload.output in ("indices", "both"):
+        body["indices"] = indices.tolist()
+    if payload.output in ("emoji", "both"):
+        body["emoji"] = [dataset.emoji_list[idx] for idx in indices.tolist()]
+    return JSONResponse(body)
 
-    preview_png = _build_preview(grid, settings_payload, grid_result.grid_w, grid_result.grid_h)
 
-    result = ConversionResult(
-        grid=grid,
-        grid_w=grid_result.grid_w,
-        grid_h=grid_result.grid_h,
-        grid_spaced=grid_spaced,
-        preview_png=preview_png,
-        dataset_version=DATASET.version,
-        warnings=warnings,
-    )
-    CONVERSION_CACHE.set(image_hash, result)
+@router.get("/preview/{hash}")
+async def preview_png(request: Request, hash: str) -> Response:
+    async def build() -> Response:
+        cached = _require_cached(hash)
+        if cached.preview_png is None:
+            raise HTTPException(status_code=404, detail="No preview available for this grid size")
+        return Response(content=cached.preview_png, media_type="image/png")
 
-    return _response_from_cache(image_hash, result, warnings)
+    return await conditional_response(request, export_etag(hash, "preview", {}), build)
 
 
 @router.get("/export/text")
-async def export_text(hash: str, spaced: int = 0) -> Response:
-    cached = CONVERSION_CACHE.get(hash)
-    if cached is None:
-        raise HTTPException(status_code=404, detail="Unknown hash")
-    lines = cached.grid_spaced if spaced else ["".join(row) for row in cached.grid]
-    content = "\n".join(lines)
-    headers = {"Content-Disposition": "attachment; filename=emoji-art.txt"}
-    return Response(content=content, media_type="text/plain", headers=headers)
+@_profiled
+async def export_text(request: Request, hash: str, spaced: int = 0) -> Response:
+    async def build() -> Response:
+        cached = _require_cached(hash)
+        dataset = await run_in_threadpool(_dataset_for, cached)
+        headers = {"Content-Disposition": "attachment; filename=emoji-art.txt"}
+        if _is_large_grid(cached.grid_w, cached.grid_h):
+            separator = " " if spaced else ""
+            lines = _stream_text_rows(cached.indices, dataset.emoji_list, separator)
+            return StreamingResponse(lines, media_type="text/plain", headers=headers)
+        with stage("encode"):
+            lines = cached.spaced_rows(dataset.emoji_list) if spaced else cached.rows(dataset.emoji_list)
+            content = "\n".join(lines)
+        return Response(content=content, media_type="text/plain", headers=headers)
+
+    return await conditional_response(request, export_etag(hash, "text", {"spaced": bool(spaced)}), build)
 
 
 @router.get("/export/png")
-async def export_png(hash: str, bg: str = "transparent", color: str = "#ffffff") -> Response:
-    cached = CONVERSION_CACHE.get(hash)
-    if cached is None:
-        raise HTTPException(status_code=404, detail="Unknown hash")
-
-    settings = RenderSettings(cell_size=48, bg_mode=bg, bg_color=color)
-    png_bytes = render_mosaic(_grid_to_indices(cached.grid), DATASET.asset_paths, settings, EMOJI_IMAGE_CACHE, "png")
-    headers = {"Content-Disposition": "attachment; filename=emoji-art.png"}
-    return Response(content=png_bytes, media_type="image/png", headers=headers)
+@_profiled
+async def export_png(request: Request, hash: str, bg: str = "transparent", color: str = "#ffffff") -> Response:
+    async def build() -> Response:
+        cached = _require_cached(hash)
+        settings = RenderSettings(cell_size=EXPORT_CELL_SIZE, bg_mode=bg, bg_color=color)
+        headers = {"Content-Disposition": "attachment; filename=emoji-art.png"}
+        cost = estimate_cost(cached.grid_w * cached.grid_h, cell_size=EXPORT_CELL_SIZE)
+        if _is_large_grid(cached.grid_w, cached.grid_h):
+            release = await _acquire(cost)
+            try:
+                atlas = await run_in_threadpool(_export_atlas, cached)
+                chunks = stream_mosaic_png(cached.indices, atlas, settings)
+            except BaseException:
+                release()
+                raise
+            return AdmittedStreamingResponse(chunks, release, media_type="image/png", headers=headers)
+        async with _admitted(cost):
+            with stage("encode"):
+                png_bytes = await run_in_threadpool(profiled_call, _render_cached, cached, settings, "png")
+        return Response(content=png_bytes, media_type="image/png", headers=headers)
+
+    params = {"bg": bg, "color": color.lower(), "cell_size": EXPORT_CELL_SIZE}
+    return await conditional_response(request, export_etag(hash, "png", params), build)
+
+
+@router.get("/export/svg")
+@_profiled
+async def export_svg(request: Request, hash: str, bg: str = "transparent", color: str = "#ffffff") -> Response:
+    async def build() -> Response:
+        cached = _require_cached(hash)
+        settings = RenderSettings(cell_size=EXPORT_CELL_SIZE, bg_mode=bg, bg_color=color)
+        dataset = await run_in_threadpool(_dataset_for, cached)
+        try:
+            chunks = stream_mosaic_svg(cached.indices, dataset.asset_paths, settings)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        headers = {"Content-Disposition": "attachment; filename=emoji-art.svg"}
+        return StreamingResponse(chunks, media_type="image/svg+xml", headers=headers)
+
+    params = {"bg": bg, "color": color.lower(), "cell_size": EXPORT_CELL_SIZE}
+    return await conditional_response(request, export_etag(hash, "svg", params), build)
 
 
 @router.get("/export/jpg")
-async def export_jpg(hash: str, color: str = "#ffffff") -> Response:
-    cached = CONVERSION_CACHE.get(hash)
+@_profiled
+async def export_jpg(request: Request, hash: str, color: str = "#ffffff") -> Response:
+    async def build() -> Response:
+        cached = _require_cached(hash)
+        if _is_large_grid(cached.grid_w, cached.grid_h):
+            raise HTTPException(status_code=400, detail="JPG export is limited to standard grid sizes; use PNG.")
+        settings = RenderSettings(cell_size=EXPORT_CELL_SIZE, bg_mode="solid", bg_color=color)
+        async with _admitted(estimate_cost(cached.grid_w * cached.grid_h, cell_size=EXPORT_CELL_SIZE)):
+            with stage("encode"):
+                jpg_bytes = await run_in_threadpool(profiled_call, _render_cached, cached, settings, "jpg")
+        headers = {"Content-Disposition": "attachment; filename=emoji-art.jpg"}
+        return Response(content=jpg_bytes, media_type="image/jpeg", headers=headers)
+
+    params = {"color": color.lower(), "cell_size": EXPORT_CELL_SIZE}
+    return await conditional_response(request, export_etag(hash, "jpg", params), build)
+
+
+@router.get("/bundle")
+async def client_bundle_manifest() -> Response:
+    version = DATASETS.default_version
+    digest = await run_in_threadpool(_bundle_digest, version)
+    body = {
+        "version": version,
+        "format": BUNDLE_FORMAT,
+        "digest": digest,
+        "url": f"/api/bundle/{version}?digest={digest}",
+    }
+    # The manifest follows runtime dataset switches; the bundle it points at never changes.
+    return JSONResponse(body, headers={"Cache-Control": "no-cache"})
+
+
+@router.get("/bundle/{version}")
+async def client_bundle(
+    request: Request,
+    version: str = FastAPIPath(pattern=r"^[A-Za-z0-9_-]+$"),
+    digest: Optional[str] = Query(None),
+) -> Response:
+    compressed = accepts_encoding(request.headers.get("accept-encoding"), "gzip")
+    current = await run_in_threadpool(_bundle_digest, version)
+    # Only a URL naming the exact content served may be cached forever; a dataset rebuilt
+    # under the same version name gets a new digest, so older URLs must revalidate.
+    cache_control = IMMUTABLE_CACHE_CONTROL if digest == current else "no-cache"
+
+    async def build() -> Response:
+        body = await run_in_threadpool(_client_bundle, version, compressed)
+        headers = {"Content-Encoding": "gzip"} if compressed else {}
+        return Response(content=body, media_type="application/octet-stream", headers=headers)
+
+    etag = export_etag(current, "bundle", {"gzip": compressed})
+    return await conditional_response(request, etag, build, cache_control=cache_control, vary="Accept-Encoding")
+
+
+@router.get("/admin/dataset")
+async def dataset_status(request: Request) -> dict:
+    _require_admin(request)
+    return _dataset_status()
+
+
+@router.put("/admin/dataset")
+async def switch_dataset(request: Request, payload: DatasetSwitchPayload) -> dict:
+    _require_admin(request)
+    try:
+        # Loading happens in the threadpool; the switch itself is a single assignment.
+        await run_in_threadpool(DATASETS.set_default, payload.version)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset version: {payload.version}") from exc
+    return _dataset_status()
+
+
+@router.get("/profiles/{request_id}")
+async def profile_timeline(request: Request, request_id: str) -> Response:
+    path = profile_path(CONFIG.profile_dir, request_id, TIMELINE_FILE) if _is_profiling_admin(request) else None
+    if path is None:
+        raise HTTPException(status_code=404, detail="Unknown profile")
+    return FileResponse(path, media_type="application/json")
+
+
+@router.get("/profiles/{request_id}/pstats")
+async def profile_pstats(request: Request, request_id: str) -> Response:
+    path = profile_path(CONFIG.profile_dir, request_id, PSTATS_FILE) if _is_profiling_admin(request) else None
+    if path is None:
+        raise HTTPException(status_code=404, detail="Unknown profile")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{request_id}.pstats")
+
+
+def _require_admin(request: Request) -> None:
+    token = request.headers.get(ADMIN_TOKEN_HEADER)
+    if not CONFIG.admin_token or token is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(token.encode("utf-8"), CONFIG.admin_token.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def _dataset_status() -> dict:
+    return {
+        "default_version": DATASETS.default_version,
+        "resident_versions": DATASETS.resident_versions(),
+        "available_versions": available_versions(),
+    }
+
+
+def _is_profiling_admin(request: Request) -> bool:
+    token = request.headers.get(PROFILE_TOKEN_HEADER)
+    if not CONFIG.profiling_enabled or not CONFIG.profile_token or token is None:
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), CONFIG.profile_token.encode("utf-8"))
+
+
+async def _acquire(cost: float) -> Callable[[], None]:
+    try:
+        return await ADMISSION.acquire(cost)
+    except AdmissionRejected as exc:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy; retry later.",
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
+
+
+@asynccontextmanager
+async def _admitted(cost: float) -> AsyncIterator[None]:
+    release = await _acquire(cost)
+    try:
+        yield
+    finally:
+        release()
+
+
+def start_warmup() -> None:
+    """Warm this worker in the background; ``READINESS`` flips once it is done."""
+    if not CONFIG.warmup:
+        READINESS.mark_ready()
+        return
+    READINESS.start(_warmup_steps())
+
+
+def _warmup_steps() -> list[WarmupStep]:
+    dataset = DATASETS.get
+    steps: list[WarmupStep] = [("dataset", dataset)]
+    if CONFIG.shared_sprites:
+        steps += [
+            ("preview_sprites", lambda: _sprite_atlas(dataset(), PREVIEW_CELL_SIZE)),
+            ("export_sprites", lambda: _sprite_atlas(dataset(), EXPORT_CELL_SIZE)),
+        ]
+    steps += [
+        ("conversion", lambda: _warmup_conversion(dataset())),
+        ("export", lambda: _warmup_export(dataset())),
+    ]
+    return steps
+
+
+def _warmup_conversion(dataset: EmojiDataset) -> ConversionResult:
+    # A full hue/lightness sweep exercises decode, features, matching and preview encoding,
+    # and seeds the memo cache with the colors real images hit most.
+    hues = np.linspace(0, 255, 64, dtype=np.uint8)
+    lightness = np.linspace(40, 255, 48, dtype=np.uint8)
+    hsv = np.stack(np.broadcast_arrays(hues[None, :], 200, lightness[:, None]), axis=-1).astype(np.uint8)
+    image = Image.fromarray(hsv, "HSV").convert("RGB")
+    settings_payload = SettingsPayload(max_dim=64)
+    grid_result = compute_grid_size(*image.size, settings_payload.max_dim, None, None, True)
+    key = ContentKey(hash="warmup", seed=0)
+    return _run_conversion(dataset, image, key, settings_payload, (0, 0, *image.size), grid_result, [])
+
+
+def _warmup_export(dataset: EmojiDataset) -> None:
+    indices = pack_indices(np.arange(64) % len(dataset.emoji_list), 8, 8)
+    for bg_mode, output_format in (("transparent", "png"), ("solid", "jpg")):
+        settings = RenderSettings(cell_size=EXPORT_CELL_SIZE, bg_mode=bg_mode, bg_color="#ffffff")
+        _render(dataset, indices, settings, output_format)
+
+
+def _is_large_grid(grid_w: int, grid_h: int) -> bool:
+    return grid_w > STANDARD_MAX_DIM or grid_h > STANDARD_MAX_DIM
+
+
+def _tile_executor() -> ProcessPoolExecutor:
+    global TILE_EXECUTOR
+    with TILE_EXECUTOR_LOCK:
+        if TILE_EXECUTOR is None:
+            TILE_EXECUTOR = ProcessPoolExecutor(
+                max_workers=CONFIG.tile_workers,
+                # Spawn rather than fork: the server process already runs threads.
+                mp_context=multiprocessing.get_context("spawn"),
+                # Workers memory-map each dataset version's features on first use.
+                initializer=init_tile_worker,
+            )
+        return TILE_EXECUTOR
+
+
+def shutdown_tile_executor() -> None:
+    global TILE_EXECUTOR
+    with TILE_EXECUTOR_LOCK:
+        executor, TILE_EXECUTOR = TILE_EXECUTOR, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _require_cached(hash_value: str) -> ConversionResult:
+    cached = CONVERSION_CACHE.get(hash_value)
     if cached is None:
         raise HTTPException(status_code=404, detail="Unknown hash")
+    return cached
+
+
+def _run_conversion(
+    dataset: EmojiDataset,
+    image: Image.Image,
+    key: ContentKey,
+    settings_payload: SettingsPayload,
+    crop_box: tuple[int, int, int, int],
+    grid_result: GridResult,
+    warnings: list[str],
+) -> ConversionResult:
+    crop_x, crop_y, crop_w, crop_h = crop_box
+    with stage("decode"):
+        rgba = image.convert("RGBA")
+    with stage("crop"):
+        cropped = rgba.crop((crop_x, crop_y, crop_x + crop_w, crop_y + crop_h))
+
+    seed = key.seed if settings_payload.deterministic else None
+
+    weights = MatchWeights(
+        color=settings_payload.weights.color,
+        edge=settings_payload.weights.edge,
+        alpha=settings_payload.weights.alpha,
+        metric=settings_payload.metric,
+    )
 
-    settings = RenderSettings(cell_size=48, bg_mode="solid", bg_color=color)
-    jpg_bytes = render_mosaic(_grid_to_indices(cached.grid), DATASET.asset_paths, settings, EMOJI_IMAGE_CACHE, "jpg")
-    headers = {"Content-Disposition": "attachment; filename=emoji-art.jpg"}
-    return Response(content=jpg_bytes, media_type="image/jpeg", headers=headers)
+    if _is_large_grid(grid_result.grid_w, grid_result.grid_h):
+        if settings_payload.dithering:
+            warnings.append("Dithering is not available in large-grid mode; using direct matching.")
+        # Tiles extract features and match in one pass, so both land in the match stage.
+        with stage("match"):
+            packed = match_tiled(
+                cropped,
+                grid_result.grid_w,
+                grid_result.grid_h,
+                weights,
+                settings_payload.deterministic,
+                seed,
+                _tile_executor(),
+                dataset.version,
+            )
+    else:
+        with stage("features"):
+            cell_features, _, _, _ = compute_grid_features(cropped, grid_result.grid_w, grid_result.grid_h)
+
+        if settings_payload.dithering:
+            warnings.append("Dithering is not yet implemented; using direct matching.")
+            cell_features = apply_dithering(cell_features)
+
+        with stage("match"):
+            indices = match_features(
+                cell_features,
+                dataset.features,
+                weights,
+                settings_payload.deterministic,
+                rng=random.Random(seed) if seed is not None else None,
+                memo_cache=_memo_cache(dataset.version),
+            )
+            packed = pack_indices(indices, grid_result.grid_w, grid_result.grid_h)
+
+    with stage("preview"):
+        preview_png = _build_preview(dataset, packed, settings_payload)
+
+    with stage("encode"):
+        grid_rows = grid_spaced = None
+        if _is_large_grid(grid_result.grid_w, grid_result.grid_h):
+            warnings.append("Grid is too large to inline; download it from /api/export/text.")
+        else:
+            grid_rows, grid_spaced = text_rows(packed, dataset.emoji_list)
+        response_body, response_spans = serialize_response(
+            key.hash,
+            grid_result.grid_w,
+            grid_result.grid_h,
+            grid_rows,
+            grid_spaced,
+            preview_png is not None,
+            warnings,
+        )
+    return ConversionResult(
+        indices=packed,
+        dataset_version=dataset.version,
+        preview_png=preview_png,
+        warnings=warnings,
+        response_body=response_body,
+        response_spans=response_spans,
+    )
 
 
 def _normalize_crop(
@@ -189,47 +735,124 @@ def _normalize_crop(
     return x, y, w, h
 
 
-def _indices_to_grid(indices, emoji_list, grid_w, grid_h) -> list[list[str]]:
-    grid: list[list[str]] = []
-    for row in range(grid_h):
-        row_indices = indices[row * grid_w : (row + 1) * grid_w]
-        grid.append([emoji_list[idx] for idx in row_indices])
-    return grid
-
-
-def _grid_to_indices(grid: list[list[str]]) -> list[list[int]]:
-    index_lookup = {emoji: idx for idx, emoji in enumerate(DATASET.emoji_list)}
-    return [[index_lookup[emoji] for emoji in row] for row in grid]
-
-
-def _build_preview(grid: list[list[str]], settings: SettingsPayload, grid_w: int, grid_h: int) -> Optional[bytes]:
-    preview_size = 10
-    if grid_w * preview_size > 1600 or grid_h * preview_size > 1600:
+def _build_preview(dataset: EmojiDataset, indices: np.ndarray, settings: SettingsPayload) -> Optional[bytes]:
+    grid_h, grid_w = indices.shape
+    if grid_w * PREVIEW_CELL_SIZE > 1600 or grid_h * PREVIEW_CELL_SIZE > 1600:
         return None
     render_settings = RenderSettings(
-        cell_size=preview_size,
+        cell_size=PREVIEW_CELL_SIZE,
         bg_mode=settings.bg_mode,
         bg_color=settings.bg_color,
     )
-    return render_mosaic(_grid_to_indices(grid), DATASET.asset_paths, render_settings, EMOJI_IMAGE_CACHE, "png")
-
-
-def _response_from_cache(hash_value: str, cached: ConversionResult, extra_warnings: Optional[list[str]] = None) -> dict[str, Any]:
-    grid_strings = ["".join(row) for row in cached.grid]
-    warnings = list(cached.warnings)
-    if extra_warnings:
-        warnings.extend(extra_warnings)
+    return _render(dataset, indices, render_settings, "png")
 
-    preview_b64 = None
-    if cached.preview_png is not None:
-        preview_b64 = base64.b64encode(cached.preview_png).decode("ascii")
 
-    return {
-        "grid_w": cached.grid_w,
-        "grid_h": cached.grid_h,
-        "grid": grid_strings,
-        "grid_spaced": cached.grid_spaced,
-        "preview_png_base64": preview_b64,
-        "hash": hash_value,
-        "warnings": warnings,
-    }
+def _dataset_for(cached: ConversionResult) -> EmojiDataset:
+    try:
+        return DATASETS.get(cached.dataset_version)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=410, detail="Dataset version is no longer available") from exc
+
+
+def _client_bundle(version: str, compressed: bool) -> bytes:
+    body = CLIENT_BUNDLES.get((version, compressed))
+    if body is not None:
+        return body
+    raw = CLIENT_BUNDLES.get((version, False))
+    if raw is None:
+        try:
+            dataset = DATASETS.get(version)
+        except FileNotFoundError as exc:
+            raise HTTPException(status_code=404, detail="Unknown dataset version") from exc
+        sprites = _sprite_atlas(dataset, PREVIEW_CELL_SIZE).sprites
+        raw = encode_bundle(dataset.version, dataset.emoji_list, dataset.features, sprites)
+    body = gzip.compress(raw, compresslevel=6) if compressed else raw
+    with DATASET_STATE_LOCK:
+        CLIENT_BUNDLES[(version, False)] = raw
+        CLIENT_BUNDLES[(version, compressed)] = body
+    return body
+
+
+def _bundle_digest(version: str) -> str:
+    digest = CLIENT_BUNDLE_DIGESTS.get(version)
+    if digest is None:
+        digest = hashlib.blake2b(_client_bundle(version, False), digest_size=8).hexdigest()
+        with DATASET_STATE_LOCK:
+            CLIENT_BUNDLE_DIGESTS[version] = digest
+    return digest
+
+
+def _memo_cache(version: str) -> FeatureMemoCache:
+    memo = FEATURE_MEMO_CACHES.get(version)
+    if memo is not None:
+        return memo
+    with DATASET_STATE_LOCK:
+        return FEATURE_MEMO_CACHES.setdefault(version, FeatureMemoCache(max_size=4096))
+
+
+def _drop_dataset_state(version: str) -> None:
+    with DATASET_STATE_LOCK:
+        FEATURE_MEMO_CACHES.pop(version, None)
+        for key in [key for key in SPRITE_ATLASES if key[0] == version]:
+            del SPRITE_ATLASES[key]
+        for key in [key for key in CLIENT_BUNDLES if key[0] == version]:
+            del CLIENT_BUNDLES[key]
+        CLIENT_BUNDLE_DIGESTS.pop(version, None)
+
+
+def _sprite_atlas(dataset: EmojiDataset, size: int) -> SpriteAtlas:
+    atlas = SPRITE_ATLASES.get((dataset.version, size))
+    if atlas is not None:
+        return atlas
+    # Builds take seconds, so they serialize on their own lock rather than DATASET_STATE_LOCK.
+    with ATLAS_BUILD_LOCK:
+        atlas = SPRITE_ATLASES.get((dataset.version, size))
+        if atlas is None:
+            path = CONFIG.shared_dir / atlas_filename(dataset.version, dataset.emoji_list, dataset.features, size)
+            atlas = SpriteAtlas(open_mapped_array(path, lambda: build_atlas(dataset.asset_paths, size)))
+            with DATASET_STATE_LOCK:
+                SPRITE_ATLASES[(dataset.version, size)] = atlas
+    return atlas
+
+
+def _export_atlas(cached: ConversionResult) -> SpriteAtlas:
+    return _sprite_atlas(_dataset_for(cached), EXPORT_CELL_SIZE)
+
+
+def _render_cached(cached: ConversionResult, settings: RenderSettings, output_format: str) -> bytes:
+    # Resolving the dataset may load it from disk, so this runs in the threadpool too.
+    return _render(_dataset_for(cached), cached.indices, settings, output_format)
+
+
+def _render(dataset: EmojiDataset, indices: np.ndarray, settings: RenderSettings, output_format: str) -> bytes:
+    if CONFIG.shared_sprites:
+        atlas = _sprite_atlas(dataset, settings.cell_size)
+        return render_mosaic_from_atlas(indices.tolist(), atlas, settings, output_format)
+    return render_mosaic(indices.tolist(), dataset.asset_paths, settings, EMOJI_IMAGE_CACHE, output_format)
+
+
+def _stream_text_rows(indices: np.ndarray, emoji_list: list[str], separator: str) -> Iterator[str]:
+    for row_number, row in enumerate(indices.tolist()):
+        prefix = "\n" if row_number else ""
+        yield prefix + separator.join(emoji_list[idx] for idx in row)
+
+
+def _stream_frame_text(frames: Iterable[AnimationFrame], emoji_list: list[str]) -> Iterator[str]:
+    for frame in frames:
+        rows = ["".join(emoji_list[idx] for idx in row) for row in frame.indices.tolist()]
+        yield f"# frame {frame.index} duration={frame.duration}ms rematched={frame.rematched}\n"
+        yield "\n".join(rows) + "\n"
+
+
+def _response_from_cache(cached: ConversionResult, fields: tuple[str, ...]) -> Response:
+    if fields == STORED_RESPONSE_FIELDS:
+        return Response(content=cached.response_body, media_type="application/json")
+    extra = None
+    if "preview_png_base64" in fields:
+        member = cached.response_extras.get("preview_png_base64")
+        if member is None:
+            member = encode_preview_member(cached.preview_png)
+            cached.response_extras["preview_png_base64"] = member
+        extra = {"preview_png_base64": member}
+    body = assemble_body(cached.response_body, cached.response_spans, fields, extra)
+    return Response(content=body, media_type="application/json")
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -23,13 +23,35 @@ class SettingsPayload(BaseModel):
     grid_w: Optional[int] = None
     grid_h: Optional[int] = None
     lock_aspect: bool = True
+    large_grid: bool = False
     dithering: bool = False
     deterministic: bool = True
     emoji_set: Optional[str] = "full"
     bg_mode: str = "transparent"
     bg_color: str = "#ffffff"
     weights: WeightPayload = Field(default_factory=WeightPayload)
+    metric: Literal["euclidean", "ciede2000"] = "euclidean"
 
     @classmethod
     def from_json(cls, payload: dict[str, Any]) -> "SettingsPayload":
         return cls.model_validate(payload)
+
+
+class AnimationPayload(BaseModel):
+    output: Literal["gif", "apng", "text"] = "gif"
+    rematch_threshold: float = Field(default=2.0, ge=0.0)
+    max_frames: int = Field(default=300, ge=1, le=1000)
+    cell_size: int = Field(default=16, ge=4, le=48)
+
+
+class DatasetSwitchPayload(BaseModel):
+    version: str = Field(pattern=r"^[A-Za-z0-9_-]+$")
+
+
+class MatchPayload(BaseModel):
+    space: Literal["rgb", "lab", "features"] = "rgb"
+    vectors: list[list[float]] = Field(min_length=1, max_length=4096)
+    weights: WeightPayload = Field(default_factory=WeightPayload)
+    metric: Literal["euclidean", "ciede2000"] = "euclidean"
+    emoji_set: Optional[str] = "full"
+    output: Literal["indices", "emoji", "both"] = "both"
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import BinaryIO
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from PIL import Image
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.hashing import ContentHasher
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# Room for the multipart framing and the small JSON form fields sent next to the file.
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+
+@dataclass(frozen=True)
+class IngestedUpload:
+    hasher: ContentHasher
+    stream: BinaryIO
+
+
+async def ingest_upload(file: UploadFile, max_bytes: int) -> IngestedUpload:
+    """Hash the upload in chunks, rejecting it past ``max_bytes``, and rewind it for decoding."""
+    hasher = ContentHasher()
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        hasher.update(chunk)
+        if hasher.size > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Upload exceeds the {max_bytes} byte limit.")
+    if hasher.size == 0:
+        raise HTTPException(status_code=400, detail="Empty upload.")
+    await file.seek(0)
+    return IngestedUpload(hasher=hasher, stream=file.file)
+
+
+def open_image(stream: BinaryIO, max_pixels: int) -> Image.Image:
+    """Open an image lazily and check its declared size before any pixel data is decoded."""
+    try:
+        image = Image.open(stream)
+    except Exception as exc:  # noqa: BLE001
+        raise HTTPException(status_code=400, detail="Unable to decode image.") from exc
+    width, height = image.size
+    if width * height > max_pixels:
+        raise HTTPException(status_code=413, detail=f"Image exceeds the {max_pixels} pixel limit.")
+    return image
+
+
+class UploadLimitMiddleware:
+    """Reject uploads whose Content-Length is over the limit before Starlette spools the form."""
+
+    def __init__(self, app: ASGIApp, max_bytes: int, paths: tuple[str, ...]) -> None:
+        self._app = app
+        self._max_bytes = max_bytes
+        self._paths = paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"] in self._paths:
+            length = Headers(scope=scope).get("content-length", "")
+            if length.isdigit() and int(length) > self._max_bytes + FORM_OVERHEAD_BYTES:
+                detail = f"Upload exceeds the {self._max_bytes} byte limit."
+                await JSONResponse({"detail": detail}, status_code=413)(scope, receive, send)
+                return
+        await self._app(scope, receive, send)
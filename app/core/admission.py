@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional
+
+# Cost units are roughly "one megapixel of work": decoding/resampling the upload, matching
+# a thousand cells against the emoji table, or compositing a megapixel of output.
+MATCH_CELLS_PER_UNIT = 1000
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("Server is at capacity")
+        self.retry_after = retry_after
+
+
+def estimate_cost(cells: int, pixels: int = 0, cell_size: int = 0) -> float:
+    match_cost = cells / MATCH_CELLS_PER_UNIT
+    decode_cost = pixels / 1_000_000
+    render_cost = cells * cell_size * cell_size / 1_000_000
+    return match_cost + decode_cost + render_cost
+
+
+class AdmissionController:
+    """Per-worker cost budget with a bounded FIFO wait; oversized requests run alone."""
+
+    def __init__(self, budget: float, max_wait: float, max_queue: int) -> None:
+        if budget <= 0:
+            raise ValueError("budget must be positive")
+        self._budget = budget
+        self._max_wait = max_wait
+        self._max_queue = max_queue
+        self._in_use = 0.0
+        self._usage_lock = threading.Lock()
+        self._queue: deque[object] = deque()
+        self._condition: Optional[asyncio.Condition] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def in_use(self) -> float:
+        return self._in_use
+
+    async def acquire(self, cost: float) -> Callable[[], None]:
+        """Wait for capacity and return a release callback that is safe to call from any thread."""
+        cost = min(cost, self._budget)
+        condition = self._bind_loop()
+        async with condition:
+            if len(self._queue) >= self._max_queue:
+                raise AdmissionRejected(self._retry_after())
+            ticket = object()
+            self._queue.append(ticket)
+            try:
+                await asyncio.wait_for(
+                    condition.wait_for(lambda: self._queue[0] is ticket and self._in_use + cost <= self._budget),
+                    timeout=self._max_wait,
+                )
+            except asyncio.TimeoutError as exc:
+                raise AdmissionRejected(self._retry_after()) from exc
+            finally:
+                self._queue.remove(ticket)
+                condition.notify_all()
+            with self._usage_lock:
+                self._in_use += cost
+
+        loop = asyncio.get_running_loop()
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            with self._usage_lock:
+                if released:
+                    return
+                released = True
+                self._in_use = max(0.0, self._in_use - cost)
+            try:
+                loop.call_soon_threadsafe(lambda: loop.create_task(self._wake_waiters()))
+            except RuntimeError:
+                # The loop already shut down, so nobody is left waiting on it.
+                pass
+
+        return release
+
+    @asynccontextmanager
+    async def admit(self, cost: float) -> AsyncIterator[None]:
+        release = await self.acquire(cost)
+        try:
+            yield
+        finally:
+            release()
+
+    async def _wake_waiters(self) -> None:
+        condition = self._bind_loop()
+        async with condition:
+            condition.notify_all()
+
+    def _bind_loop(self) -> asyncio.Condition:
+        # asyncio primitives belong to one event loop; rebuild the condition if the server
+        # (or a test client) starts a new loop.
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._loop is not loop:
+            self._condition = asyncio.Condition()
+            self._loop = loop
+        return self._condition
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(self._max_wait))
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+from PIL import Image, ImageSequence
+
+from app.core.cache import INDEX_DTYPE, FeatureMemoCache
+from app.core.features import compute_grid_features
+from app.core.matcher import MatchWeights, match_features
+
+
+@dataclass(frozen=True)
+class AnimationFrame:
+    index: int
+    indices: np.ndarray
+    duration: int
+    rematched: int
+
+
+def iter_frames(
+    image: Image.Image,
+    box: tuple[int, int, int, int],
+    max_frames: int,
+    default_duration: int = 100,
+) -> Iterator[tuple[Image.Image, int]]:
+    """Yield cropped RGBA frames one at a time without decoding the whole sequence."""
+    for frame_number, frame in enumerate(ImageSequence.Iterator(image)):
+        if frame_number >= max_frames:
+            break
+        duration = int(frame.info.get("duration") or default_duration)
+        yield frame.convert("RGBA").crop(box), duration
+
+
+def _feature_delta(features: np.ndarray, reference: np.ndarray, weights: MatchWeights) -> np.ndarray:
+    diff = features - reference
+    return np.sqrt(
+        weights.color * np.sum(diff[:, 0:3] ** 2, axis=1)
+        + weights.edge * diff[:, 3] ** 2
+        + weights.alpha * diff[:, 4] ** 2
+    )
+
+
+def match_frames(
+    frames: Iterable[tuple[Image.Image, int]],
+    grid_w: int,
+    grid_h: int,
+    emoji_features: np.ndarray,
+    weights: MatchWeights,
+    deterministic: bool,
+    threshold: float,
+    rng: Optional[random.Random] = None,
+    memo_cache: Optional[FeatureMemoCache] = None,
+) -> Iterator[AnimationFrame]:
+    """Match a frame stream, rematching only cells that drifted past ``threshold`` since last matched."""
+    reference: Optional[np.ndarray] = None
+    current = np.zeros((grid_w * grid_h,), dtype=INDEX_DTYPE)
+
+    for frame_number, (frame, duration) in enumerate(frames):
+        features, _, _, _ = compute_grid_features(frame, grid_w, grid_h)
+        if reference is None:
+            changed = np.ones((features.shape[0],), dtype=bool)
+            reference = features.copy()
+        else:
+            changed = _feature_delta(features, reference, weights) > threshold
+
+        if changed.any():
+            current[changed] = match_features(
+                features[changed],
+                emoji_features,
+                weights,
+                deterministic,
+                rng=rng,
+                memo_cache=memo_cache,
+            )
+            reference[changed] = features[changed]
+
+        yield AnimationFrame(
+            index=frame_number,
+            indices=current.reshape(grid_h, grid_w).copy(),
+            duration=duration,
+            rematched=int(changed.sum()),
+        )
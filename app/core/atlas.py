@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+
+def load_sprite(path: Path, size: int) -> Image.Image:
+    image = Image.open(path).convert("RGBA")
+    return image.resize((size, size), Image.Resampling.LANCZOS)
+
+
+def build_atlas(asset_paths: list[Path], size: int) -> np.ndarray:
+    """Decode and scale every emoji asset into one (N, size, size, 4) uint8 array."""
+    sprites = np.empty((len(asset_paths), size, size, 4), dtype=np.uint8)
+    for idx, path in enumerate(asset_paths):
+        sprites[idx] = np.asarray(load_sprite(path, size))
+    return sprites
+
+
+class SpriteAtlas:
+    """Read-only view over pre-scaled emoji sprites, whatever memory backs the array."""
+
+    def __init__(self, sprites: np.ndarray) -> None:
+        if sprites.ndim != 4 or sprites.shape[1] != sprites.shape[2] or sprites.shape[3] != 4:
+            raise ValueError("Atlas must have shape (N, size, size, 4)")
+        self._sprites = sprites
+
+    @property
+    def sprites(self) -> np.ndarray:
+        return self._sprites
+
+    @property
+    def cell_size(self) -> int:
+        return int(self._sprites.shape[1])
+
+    def __len__(self) -> int:
+        return int(self._sprites.shape[0])
+
+    def image(self, idx: int) -> Image.Image:
+        return Image.fromarray(self._sprites[idx])
+
+
+def atlas_filename(version: str, emoji_list: list[str], features: np.ndarray, size: int) -> str:
+    """Name an atlas file so a rebuilt dataset never maps a stale sprite sheet."""
+    hasher = hashlib.blake2b(digest_size=8)
+    hasher.update("\n".join(emoji_list).encode("utf-8"))
+    hasher.update(np.ascontiguousarray(features).tobytes())
+    return f"atlas_{version}_{size}_{hasher.hexdigest()}.npy"
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import json
+import struct
+
+import numpy as np
+
+BUNDLE_MAGIC = b"EMJB"
+BUNDLE_FORMAT = 1
+_PREFIX = struct.Struct("<4sII")
+
+
+def encode_bundle(version: str, emoji_list: list[str], features: np.ndarray, sprites: np.ndarray) -> bytes:
+    """Prefix, JSON header, padding to 4 bytes, then float32 features and uint8 RGBA sprites."""
+    features = np.ascontiguousarray(features, dtype="<f4")
+    sprites = np.ascontiguousarray(sprites, dtype=np.uint8)
+    if features.shape[0] != len(emoji_list) or sprites.shape[0] != len(emoji_list):
+        raise ValueError("Bundle sections disagree on the emoji count")
+
+    sections: dict[str, list[int]] = {}
+    offset = 0
+    for name, array in (("features", features), ("sprites", sprites)):
+        sections[name] = [offset, array.nbytes]
+        offset += array.nbytes
+    header = json.dumps(
+        {
+            "format": BUNDLE_FORMAT,
+            "version": version,
+            "count": len(emoji_list),
+            "feature_dims": int(features.shape[1]),
+            "sprite_size": int(sprites.shape[1]),
+            "emoji_list": emoji_list,
+            "sections": sections,
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    padding = -(_PREFIX.size + len(header)) % 4
+    return b"".join(
+        (
+            _PREFIX.pack(BUNDLE_MAGIC, BUNDLE_FORMAT, len(header)),
+            header,
+            b"\0" * padding,
+            features.tobytes(),
+            sprites.tobytes(),
+        )
+    )
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 from collections import OrderedDict
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from threading import Lock
 from typing import Callable, Generic, Optional, TypeVar
 
+import numpy as np
+
 T = TypeVar("T")
 
 
@@ -54,15 +56,51 @@ class EmojiImageCache:
         self._cache.set(f"{key.path}:{key.size}", value)
 
 
+INDEX_DTYPE = np.uint16
+
+
 @dataclass(frozen=True)
 class ConversionResult:
-    grid: list[list[str]]
-    grid_w: int
-    grid_h: int
-    grid_spaced: Optional[list[str]]
-    preview_png: Optional[bytes]
+    # The uint16 indices are the only grid state; the response body is one pre-encoded bytes object.
+    indices: np.ndarray
     dataset_version: str
+    preview_png: Optional[bytes]
     warnings: list[str]
+    response_body: bytes
+    response_spans: dict[str, tuple[int, int]]
+    # Members encoded lazily on first request (the base64 preview) and reused after that.
+    response_extras: dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def grid_w(self) -> int:
+        return int(self.indices.shape[1])
+
+    @property
+    def grid_h(self) -> int:
+        return int(self.indices.shape[0])
+
+    def grid(self, emoji_list: list[str]) -> list[list[str]]:
+        return [[emoji_list[idx] for idx in row] for row in self.indices.tolist()]
+
+    def rows(self, emoji_list: list[str]) -> list[str]:
+        return ["".join(row) for row in self.grid(emoji_list)]
+
+    def spaced_rows(self, emoji_list: list[str]) -> list[str]:
+        return [" ".join(row) for row in self.grid(emoji_list)]
+
+
+def text_rows(indices: np.ndarray, emoji_list: list[str]) -> tuple[list[str], list[str]]:
+    """Plain and space-separated emoji rows, from a single pass over the grid."""
+    grid = [[emoji_list[idx] for idx in row] for row in indices.tolist()]
+    return ["".join(row) for row in grid], [" ".join(row) for row in grid]
+
+
+def pack_indices(indices: np.ndarray, grid_w: int, grid_h: int) -> np.ndarray:
+    if indices.size and int(indices.max()) > np.iinfo(INDEX_DTYPE).max:
+        raise ValueError("Emoji index exceeds compact index range")
+    packed = np.ascontiguousarray(indices, dtype=INDEX_DTYPE).reshape(grid_h, grid_w)
+    packed.setflags(write=False)
+    return packed
 
 
 class ConversionCache:
@@ -81,6 +119,8 @@ class FeatureCacheKey:
     lab: tuple[int, int, int]
     edge: int
     alpha: int
+    metric: str = "euclidean"
+    weights: tuple[float, float, float] = (1.0, 0.2, 0.1)
 
 
 class FeatureMemoCache:
@@ -94,4 +134,7 @@ class FeatureMemoCache:
         self._cache.set(self._key_to_str(key), value)
 
     def _key_to_str(self, key: FeatureCacheKey) -> str:
-        return f"{key.lab[0]}:{key.lab[1]}:{key.lab[2]}:{key.edge}:{key.alpha}"
+        return (
+            f"{key.lab[0]}:{key.lab[1]}:{key.lab[2]}:{key.edge}:{key.alpha}:{key.metric}:"
+            f"{key.weights[0]}:{key.weights[1]}:{key.weights[2]}"
+        )
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Mapping, Optional
+
+
+@dataclass(frozen=True)
+class AppConfig:
+    shared_dir: Path
+    shared_sprites: bool
+    large_grid_max_dim: int
+    tile_workers: int
+    admission_budget: float
+    admission_max_wait: float
+    admission_max_queue: int
+    max_upload_bytes: int
+    max_image_pixels: int
+    max_animation_pixels: int
+    profiling_enabled: bool
+    profile_token: str
+    profile_dir: Path
+    profile_keep: int
+    dataset_version: str
+    max_resident_datasets: int
+    admin_token: str
+    warmup: bool
+
+
+def _env_bool(env: Mapping[str, str], name: str, default: bool) -> bool:
+    value = env.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _default_tile_workers(env: Mapping[str, str]) -> int:
+    # Every server worker owns a pool, so share the CPUs between them (uvicorn reads
+    # WEB_CONCURRENCY as its worker count) and keep each pool small.
+    server_workers = max(1, int(env.get("WEB_CONCURRENCY", 1)))
+    return max(1, min(4, (os.cpu_count() or 1) // server_workers))
+
+
+def load_config(env: Optional[Mapping[str, str]] = None) -> AppConfig:
+    env = os.environ if env is None else env
+    return AppConfig(
+        shared_dir=Path(env.get("EMOJI_SHARED_DIR", Path(tempfile.gettempdir()) / "emoji52py")),
+        shared_sprites=_env_bool(env, "EMOJI_SHARED_SPRITES", True),
+        large_grid_max_dim=int(env.get("EMOJI_LARGE_GRID_MAX_DIM", 1000)),
+        tile_workers=int(env.get("EMOJI_TILE_WORKERS", _default_tile_workers(env))),
+        admission_budget=float(env.get("EMOJI_ADMISSION_BUDGET", 100.0)),
+        admission_max_wait=float(env.get("EMOJI_ADMISSION_MAX_WAIT", 10.0)),
+        admission_max_queue=int(env.get("EMOJI_ADMISSION_MAX_QUEUE", 32)),
+        max_upload_bytes=int(env.get("EMOJI_MAX_UPLOAD_BYTES", 20 * 1024 * 1024)),
+        max_image_pixels=int(env.get("EMOJI_MAX_IMAGE_PIXELS", 40_000_000)),
+        max_animation_pixels=int(env.get("EMOJI_MAX_ANIMATION_PIXELS", 50_000_000)),
+        profiling_enabled=_env_bool(env, "EMOJI_PROFILING", False),
+        profile_token=env.get("EMOJI_PROFILE_TOKEN", ""),
+        profile_dir=Path(env.get("EMOJI_PROFILE_DIR", Path(tempfile.gettempdir()) / "emoji52py-profiles")),
+        profile_keep=int(env.get("EMOJI_PROFILE_KEEP", 50)),
+        dataset_version=env.get("EMOJI_DATASET_VERSION", "v1"),
+        max_resident_datasets=int(env.get("EMOJI_MAX_RESIDENT_DATASETS", 2)),
+        admin_token=env.get("EMOJI_ADMIN_TOKEN", ""),
+        warmup=_env_bool(env, "EMOJI_WARMUP", True),
+    )
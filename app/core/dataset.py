@@ -19,7 +19,7 @@ DATA_DIR = Path(__file__).resolve().parents[1] / "data"
 ASSET_DIR = Path(__file__).resolve().parents[1] / "assets" / "twemoji_png"
 
 
-def load_dataset(version: str) -> EmojiDataset:
+def load_dataset(version: str, mmap: bool = False) -> EmojiDataset:
     index_path = DATA_DIR / f"emoji_index_{version}.json"
     features_path = DATA_DIR / f"emoji_features_{version}.npy"
 
@@ -33,7 +33,8 @@ def load_dataset(version: str) -> EmojiDataset:
 
     emoji_list = index_data["emoji_list"]
     asset_paths = [ASSET_DIR / path for path in index_data["asset_paths"]]
-    features = np.load(features_path)
+    # A read-only memory map lets every worker process share one copy via the page cache.
+    features = np.load(features_path, mmap_mode="r" if mmap else None)
 
     if len(emoji_list) != features.shape[0]:
         raise ValueError("Emoji list and feature array size mismatch")
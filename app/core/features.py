@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Tuple
+from typing import Optional, Tuple
 
 import numpy as np
 from PIL import Image
@@ -44,6 +44,76 @@ def rgb_to_lab(rgb: np.ndarray) -> np.ndarray:
     return np.stack((l_val, a_val, b_val), axis=-1)
 
 
+def vectors_to_features(vectors: np.ndarray, space: str) -> np.ndarray:
+    """Feature rows from RGB (0-255) or Lab colours, as flat opaque cells, or from feature rows."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if space == "features":
+        return vectors
+    lab = rgb_to_lab(vectors / 255.0) if space == "rgb" else vectors
+    features = np.zeros((vectors.shape[0], 5), dtype=np.float32)
+    features[:, 0:3] = lab
+    features[:, 4] = 1.0
+    return features
+
+
+def ciede2000(lab_a: np.ndarray, lab_b: np.ndarray) -> np.ndarray:
+    """CIEDE2000 color difference between Lab arrays, broadcasting over leading axes."""
+    lab_a = np.asarray(lab_a, dtype=np.float64)
+    lab_b = np.asarray(lab_b, dtype=np.float64)
+    l1, a1, b1 = lab_a[..., 0], lab_a[..., 1], lab_a[..., 2]
+    l2, a2, b2 = lab_b[..., 0], lab_b[..., 1], lab_b[..., 2]
+
+    c_bar = (np.hypot(a1, b1) + np.hypot(a2, b2)) / 2
+    c_bar7 = c_bar**7
+    g = 0.5 * (1 - np.sqrt(c_bar7 / (c_bar7 + 25.0**7)))
+    a1p = (1 + g) * a1
+    a2p = (1 + g) * a2
+    c1p = np.hypot(a1p, b1)
+    c2p = np.hypot(a2p, b2)
+    h1p = np.degrees(np.arctan2(b1, a1p)) % 360
+    h2p = np.degrees(np.arctan2(b2, a2p)) % 360
+    achromatic = c1p * c2p == 0
+
+    delta_lp = l2 - l1
+    delta_cp = c2p - c1p
+    delta_hp = h2p - h1p
+    delta_hp = np.where(delta_hp > 180, delta_hp - 360, delta_hp)
+    delta_hp = np.where(delta_hp < -180, delta_hp + 360, delta_hp)
+    delta_hp = np.where(achromatic, 0.0, delta_hp)
+    delta_big_hp = 2 * np.sqrt(c1p * c2p) * np.sin(np.radians(delta_hp / 2))
+
+    lp_bar = (l1 + l2) / 2
+    cp_bar = (c1p + c2p) / 2
+    hp_sum = h1p + h2p
+    hp_bar = np.where(
+        np.abs(h1p - h2p) <= 180,
+        hp_sum / 2,
+        np.where(hp_sum < 360, (hp_sum + 360) / 2, (hp_sum - 360) / 2),
+    )
+    hp_bar = np.where(achromatic, hp_sum, hp_bar)
+
+    t = (
+        1
+        - 0.17 * np.cos(np.radians(hp_bar - 30))
+        + 0.24 * np.cos(np.radians(2 * hp_bar))
+        + 0.32 * np.cos(np.radians(3 * hp_bar + 6))
+        - 0.20 * np.cos(np.radians(4 * hp_bar - 63))
+    )
+    delta_theta = 30 * np.exp(-(((hp_bar - 275) / 25) ** 2))
+    cp_bar7 = cp_bar**7
+    r_c = 2 * np.sqrt(cp_bar7 / (cp_bar7 + 25.0**7))
+    lp_offset = (lp_bar - 50) ** 2
+    s_l = 1 + 0.015 * lp_offset / np.sqrt(20 + lp_offset)
+    s_c = 1 + 0.045 * cp_bar
+    s_h = 1 + 0.015 * cp_bar * t
+    r_t = -np.sin(np.radians(2 * delta_theta)) * r_c
+
+    term_l = delta_lp / s_l
+    term_c = delta_cp / s_c
+    term_h = delta_big_hp / s_h
+    return np.sqrt(term_l**2 + term_c**2 + term_h**2 + r_t * term_c * term_h)
+
+
 def sobel_magnitude(luma: np.ndarray) -> np.ndarray:
     luma = luma.astype(np.float32)
     padded = np.pad(luma, 1, mode="edge")
@@ -89,11 +159,12 @@ def compute_grid_features(
     grid_w: int,
     grid_h: int,
     sample: int = 4,
+    box: Optional[Tuple[float, float, float, float]] = None,
 ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
     image = image.convert("RGBA")
     target_w = max(1, grid_w * sample)
     target_h = max(1, grid_h * sample)
-    resized = image.resize((target_w, target_h), Image.Resampling.LANCZOS)
+    resized = image.resize((target_w, target_h), Image.Resampling.LANCZOS, box=box)
     data = np.asarray(resized).astype(np.float32) / 255.0
     rgb = data[..., :3]
     alpha = data[..., 3]
@@ -2,30 +2,49 @@ from __future__ import annotations
 
 import hashlib
 import json
+from dataclasses import dataclass
 from typing import Any
 
 
-def stable_hash(image_bytes: bytes, crop: dict[str, int], settings: dict[str, Any], dataset_version: str) -> str:
-    payload = {
-        "crop": crop,
-        "settings": settings,
-        "dataset_version": dataset_version,
-    }
-    payload_bytes = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
-    hasher = hashlib.blake2b(digest_size=16)
+@dataclass(frozen=True)
+class ContentKey:
+    hash: str
+    seed: int
+
+
+class ContentHasher:
+    """Incremental BLAKE2b over the image bytes; the cache key and the RNG seed both derive from it."""
+
+    def __init__(self) -> None:
+        self._hasher = hashlib.blake2b(digest_size=16)
+        self.size = 0
+
+    def update(self, chunk: bytes) -> None:
+        self._hasher.update(chunk)
+        self.size += len(chunk)
+
+    def finalize(self, crop: dict[str, int], settings: dict[str, Any], dataset_version: str) -> ContentKey:
+        # Finalize a copy so one upload can be keyed under several payloads.
+        hasher = self._hasher.copy()
+        hasher.update(_payload_bytes(crop, settings, dataset_version))
+        digest = hasher.digest()
+        return ContentKey(hash=digest.hex(), seed=int.from_bytes(digest[:8], "big", signed=False))
+
+
+def content_key(image_bytes: bytes, crop: dict[str, int], settings: dict[str, Any], dataset_version: str) -> ContentKey:
+    hasher = ContentHasher()
     hasher.update(image_bytes)
-    hasher.update(payload_bytes)
-    return hasher.hexdigest()
+    return hasher.finalize(crop, settings, dataset_version)
 
 
-def deterministic_seed(image_bytes: bytes, crop: dict[str, int], settings: dict[str, Any], dataset_version: str) -> int:
+def stable_hash(image_bytes: bytes, crop: dict[str, int], settings: dict[str, Any], dataset_version: str) -> str:
+    return content_key(image_bytes, crop, settings, dataset_version).hash
+
+
+def _payload_bytes(crop: dict[str, int], settings: dict[str, Any], dataset_version: str) -> bytes:
     payload = {
         "crop": crop,
         "settings": settings,
         "dataset_version": dataset_version,
     }
-    payload_bytes = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
-    hasher = hashlib.blake2b(digest_size=8)
-    hasher.update(image_bytes)
-    hasher.update(payload_bytes)
-    return int.from_bytes(hasher.digest(), "big", signed=False)
+    return json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
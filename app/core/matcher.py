@@ -7,6 +7,13 @@ from typing import Iterable, Optional
 import numpy as np
 
 from app.core.cache import FeatureCacheKey, FeatureMemoCache
+from app.core.features import ciede2000
+
+METRICS = ("euclidean", "ciede2000")
+# Candidates kept from the Euclidean prefilter for the CIEDE2000 rerank.
+RERANK_CANDIDATES = 16
+# Cells matched per distance matrix, keeping each (rows, emoji) block to a few MB.
+MATCH_BLOCK_ROWS = 256
 
 
 @dataclass(frozen=True)
@@ -14,17 +21,39 @@ class MatchWeights:
     color: float = 1.0
     edge: float = 0.2
     alpha: float = 0.1
+    metric: str = "euclidean"
 
 
 def _compute_distances(
+    columns: np.ndarray,
+    targets: np.ndarray,
+    weights: MatchWeights,
+) -> np.ndarray:
+    """Weighted distances (M, N) from ``targets`` (M, 5) to emoji feature ``columns`` (5, N)."""
+    # Channel by channel on contiguous columns: no (M, N, 3) temporary, same sums as np.sum.
+    color_dist = (columns[0] - targets[:, 0:1]) ** 2
+    color_dist += (columns[1] - targets[:, 1:2]) ** 2
+    color_dist += (columns[2] - targets[:, 2:3]) ** 2
+    edge_diff = columns[3] - targets[:, 3:4]
+    alpha_diff = columns[4] - targets[:, 4:5]
+    return (
+        weights.color * color_dist
+        + weights.edge * (edge_diff ** 2)
+        + weights.alpha * (alpha_diff ** 2)
+    )
+
+
+def _perceptual_distances(
     features: np.ndarray,
-    target: np.ndarray,
+    targets: np.ndarray,
+    shortlists: np.ndarray,
     weights: MatchWeights,
 ) -> np.ndarray:
-    color_diff = features[:, 0:3] - target[0:3]
-    color_dist = np.sum(color_diff ** 2, axis=1)
-    edge_diff = features[:, 3] - target[3]
-    alpha_diff = features[:, 4] - target[4]
+    """Weighted distances with CIEDE2000 color, for ``shortlists`` (M, K) of ``targets`` (M, 5)."""
+    candidates = features[shortlists]
+    color_dist = ciede2000(candidates[..., 0:3], targets[:, None, 0:3]) ** 2
+    edge_diff = candidates[..., 3] - targets[:, None, 3]
+    alpha_diff = candidates[..., 4] - targets[:, None, 4]
     return (
         weights.color * color_dist
         + weights.edge * (edge_diff ** 2)
@@ -32,11 +61,61 @@ def _compute_distances(
     )
 
 
-def _quantize_feature(target: np.ndarray) -> FeatureCacheKey:
-    lab = (int(round(target[0] / 2)), int(round(target[1] / 2)), int(round(target[2] / 2)))
-    edge = int(round(target[3] * 100))
-    alpha = int(round(target[4] * 100))
-    return FeatureCacheKey(lab=lab, edge=edge, alpha=alpha)
+def _quantize_features(cell_features: np.ndarray, weights: MatchWeights) -> list[FeatureCacheKey]:
+    lab = np.round(cell_features[:, 0:3] / 2).astype(np.int64).tolist()
+    edge = np.round(cell_features[:, 3] * 100).astype(np.int64).tolist()
+    alpha = np.round(cell_features[:, 4] * 100).astype(np.int64).tolist()
+    weight_key = (weights.color, weights.edge, weights.alpha)
+    return [
+        FeatureCacheKey(
+            lab=tuple(lab[i]),
+            edge=edge[i],
+            alpha=alpha[i],
+            metric=weights.metric,
+            weights=weight_key,
+        )
+        for i in range(len(lab))
+    ]
+
+
+def _pick_rows(
+    distances: np.ndarray,
+    deterministic: bool,
+    rng: Optional[random.Random],
+    epsilon: float,
+) -> np.ndarray:
+    """Nearest column per row; ties go to the lowest index, or an rng pick when deterministic."""
+    near = distances <= distances.min(axis=1, keepdims=True) + epsilon
+    choices = near.argmax(axis=1)
+    if deterministic:
+        for row in np.flatnonzero(near.sum(axis=1) > 1):
+            choices[row] = rng.choice(list(np.flatnonzero(near[row])))
+    return choices
+
+
+def _nearest(
+    targets: np.ndarray,
+    emoji_features: np.ndarray,
+    weights: MatchWeights,
+    deterministic: bool,
+    rng: Optional[random.Random],
+    epsilon: float,
+) -> np.ndarray:
+    choices = np.empty((targets.shape[0],), dtype=np.int32)
+    columns = np.ascontiguousarray(emoji_features.T)
+    for start in range(0, targets.shape[0], MATCH_BLOCK_ROWS):
+        block = targets[start : start + MATCH_BLOCK_ROWS]
+        distances = _compute_distances(columns, block, weights)
+        if weights.metric == "ciede2000":
+            # Prune with the cheap metric, then rerank the shortlists with CIEDE2000.
+            k = min(RERANK_CANDIDATES, distances.shape[1])
+            shortlists = np.sort(np.argpartition(distances, k - 1, axis=1)[:, :k], axis=1)
+            reranked = _perceptual_distances(emoji_features, block, shortlists, weights)
+            picks = _pick_rows(reranked, deterministic, rng, epsilon)
+            choices[start : start + len(block)] = shortlists[np.arange(len(block)), picks]
+        else:
+            choices[start : start + len(block)] = _pick_rows(distances, deterministic, rng, epsilon)
+    return choices
 
 
 def match_features(
@@ -51,27 +130,35 @@ def match_features(
     if deterministic and rng is None:
         rng = random.Random(0)
 
+    if weights.metric not in METRICS:
+        raise ValueError(f"Unknown distance metric: {weights.metric}")
+
     indices = np.empty((cell_features.shape[0],), dtype=np.int32)
+    if memo_cache is None:
+        indices[:] = _nearest(cell_features, emoji_features, weights, deterministic, rng, epsilon)
+        return indices
 
-    for i, target in enumerate(cell_features):
-        cached = None
-        cache_key = None
-        if memo_cache is not None:
-            cache_key = _quantize_feature(target)
-            cached = memo_cache.get(cache_key)
+    # Only the first cell with each uncached key is matched; later cells sharing it copy the result.
+    keys = _quantize_features(cell_features, weights)
+    owners: dict[FeatureCacheKey, int] = {}
+    pending: list[int] = []
+    copies: list[tuple[int, int]] = []
+    for i, cache_key in enumerate(keys):
+        cached = memo_cache.get(cache_key)
         if cached is not None:
             indices[i] = cached
-            continue
-
-        distances = _compute_distances(emoji_features, target, weights)
-        min_dist = distances.min()
-        candidates = np.where(distances <= min_dist + epsilon)[0]
-        if len(candidates) == 1 or not deterministic:
-            choice = int(candidates[0])
+        elif cache_key in owners:
+            copies.append((i, owners[cache_key]))
         else:
-            choice = int(rng.choice(list(candidates)))
-        indices[i] = choice
-        if memo_cache is not None and cache_key is not None:
-            memo_cache.set(cache_key, choice)
+            owners[cache_key] = i
+            pending.append(i)
+
+    if pending:
+        rows = np.array(pending)
+        indices[rows] = _nearest(cell_features[rows], emoji_features, weights, deterministic, rng, epsilon)
+        for i in pending:
+            memo_cache.set(keys[i], int(indices[i]))
+    for i, owner in copies:
+        indices[i] = indices[owner]
 
     return indices
@@ -26,9 +26,10 @@ def compute_grid_size(
     grid_w: Optional[int],
     grid_h: Optional[int],
     lock_aspect: bool,
+    hard_cap: int = 120,
 ) -> GridResult:
     warnings: list[str] = []
-    max_dim = min(max_dim, 120)
+    max_dim = min(max_dim, hard_cap)
 
     if grid_w is None and grid_h is None:
         if width >= height:
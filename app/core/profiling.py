@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import pstats
+import re
+import shutil
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+TIMELINE_FILE = "timeline.json"
+PSTATS_FILE = "profile.pstats"
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+_TOP_ALLOCATIONS = 25
+_TOP_FUNCTIONS = 40
+DEFAULT_KEEP_PROFILES = 50
+
+# tracemalloc is process-wide, so only one request is profiled at a time.
+_ACTIVE_LOCK = threading.Lock()
+
+
+class RequestProfile:
+    """Stage timeline and cProfile samples for a single request."""
+
+    def __init__(self, request_id: str, label: str) -> None:
+        self.request_id = request_id
+        self.label = label
+        self._origin = time.perf_counter()
+        self._stages: list[dict[str, Any]] = []
+        self._stages_lock = threading.Lock()
+        self._profiler = cProfile.Profile()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            entry = {
+                "stage": name,
+                "start_ms": round((start - self._origin) * 1000, 3),
+                "duration_ms": round((end - start) * 1000, 3),
+                "thread": threading.current_thread().name,
+            }
+            with self._stages_lock:
+                self._stages.append(entry)
+
+    def call(self, fn: Callable[..., T], *args: Any) -> T:
+        # cProfile hooks only the calling thread, so enable it wherever the work runs.
+        self._profiler.enable()
+        try:
+            return fn(*args)
+        finally:
+            self._profiler.disable()
+
+    def save(self, output_dir: Path, snapshot: Optional[tracemalloc.Snapshot], peak_bytes: int) -> Path:
+        target = output_dir / self.request_id
+        target.mkdir(parents=True, exist_ok=True)
+        self._profiler.dump_stats(str(target / PSTATS_FILE))
+
+        top_functions = io.StringIO()
+        try:
+            pstats.Stats(self._profiler, stream=top_functions).sort_stats("cumulative").print_stats(_TOP_FUNCTIONS)
+        except TypeError:
+            # Nothing ran under the profiler (e.g. a cache hit).
+            pass
+        allocations = []
+        if snapshot is not None:
+            for stat in snapshot.statistics("lineno")[:_TOP_ALLOCATIONS]:
+                allocations.append({"location": str(stat.traceback), "size": stat.size, "count": stat.count})
+
+        timeline = {
+            "request_id": self.request_id,
+            "label": self.label,
+            "total_ms": round((time.perf_counter() - self._origin) * 1000, 3),
+            "peak_memory_bytes": peak_bytes,
+            "stages": self._stages,
+            "top_allocations": allocations,
+            "top_functions": top_functions.getvalue(),
+        }
+        (target / TIMELINE_FILE).write_text(json.dumps(timeline, indent=2), encoding="utf-8")
+        return target
+
+
+class _DisabledProfile:
+    request_id = None
+
+    def stage(self, name: str) -> AbstractContextManager[None]:
+        return _NULL_STAGE
+
+    def call(self, fn: Callable[..., T], *args: Any) -> T:
+        return fn(*args)
+
+
+_NULL_STAGE: AbstractContextManager[None] = nullcontext()
+_DISABLED = _DisabledProfile()
+_CURRENT: ContextVar[RequestProfile | _DisabledProfile] = ContextVar("request_profile", default=_DISABLED)
+
+
+def stage(name: str) -> AbstractContextManager[None]:
+    """Time ``name`` in the active request profile; a shared no-op when none is active."""
+    return _CURRENT.get().stage(name)
+
+
+def profiled_call(fn: Callable[..., T], *args: Any) -> T:
+    """Run ``fn`` under the active request's cProfile (meant for threadpool work)."""
+    return _CURRENT.get().call(fn, *args)
+
+
+@contextmanager
+def profile_request(
+    output_dir: Path,
+    label: str,
+    keep: int = DEFAULT_KEEP_PROFILES,
+) -> Iterator[Optional[RequestProfile]]:
+    """Profile the enclosed request, keeping the newest ``keep``; yields None if one is active."""
+    if not _ACTIVE_LOCK.acquire(blocking=False):
+        yield None
+        return
+    profile = RequestProfile(uuid.uuid4().hex, label)
+    token = _CURRENT.set(profile)
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        yield profile
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        if started_tracing:
+            tracemalloc.stop()
+        _CURRENT.reset(token)
+        _ACTIVE_LOCK.release()
+        profile.save(output_dir, snapshot, peak_bytes)
+        prune_profiles(output_dir, keep)
+
+
+def prune_profiles(output_dir: Path, keep: int) -> None:
+    """Delete all but the ``keep`` most recently written profile directories."""
+    profiles = [path for path in output_dir.iterdir() if path.is_dir() and _PROFILE_ID.match(path.name)]
+    profiles.sort(key=lambda path: path.stat().st_mtime, reverse=True)
+    for stale in profiles[max(keep, 0) :]:
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+def profile_path(output_dir: Path, request_id: str, name: str) -> Optional[Path]:
+    if not _PROFILE_ID.match(request_id):
+        return None
+    path = output_dir / request_id / name
+    return path if path.is_file() else None
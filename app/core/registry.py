@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Optional
+
+from app.core.dataset import DATA_DIR, EmojiDataset
+
+
+class DatasetRegistry:
+    """Lazily loaded dataset versions; the default is pinned, others are evicted LRU."""
+
+    def __init__(
+        self,
+        default_version: str,
+        max_resident: int,
+        loader: Callable[[str], EmojiDataset],
+        on_evict: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        if max_resident <= 0:
+            raise ValueError("max_resident must be positive")
+        self._default_version = default_version
+        self._max_resident = max_resident
+        self._loader = loader
+        self._on_evict = on_evict
+        self._resident: OrderedDict[str, EmojiDataset] = OrderedDict()
+        self._lock = Lock()
+        # Loads are serialized separately so lookups of resident versions never wait on disk.
+        self._load_lock = Lock()
+
+    @property
+    def default_version(self) -> str:
+        return self._default_version
+
+    def resident_versions(self) -> list[str]:
+        with self._lock:
+            return list(self._resident)
+
+    def get(self, version: Optional[str] = None) -> EmojiDataset:
+        """Return ``version`` (or the default); FileNotFoundError if it is not on disk."""
+        version = self._default_version if version is None else version
+        dataset = self._lookup(version)
+        if dataset is not None:
+            return dataset
+        with self._load_lock:
+            dataset = self._lookup(version)
+            if dataset is not None:
+                return dataset
+            dataset = self._loader(version)
+            with self._lock:
+                self._resident[version] = dataset
+                evicted = self._evict_locked(keep=version)
+        self._notify_evicted(evicted)
+        return dataset
+
+    def set_default(self, version: str) -> EmojiDataset:
+        """Load ``version``, then make it this process's default."""
+        dataset = self.get(version)
+        with self._lock:
+            self._default_version = version
+            # A concurrent load may have evicted it since get() returned.
+            self._resident[version] = dataset
+            self._resident.move_to_end(version)
+            evicted = self._evict_locked(keep=version)
+        self._notify_evicted(evicted)
+        return dataset
+
+    def _lookup(self, version: str) -> Optional[EmojiDataset]:
+        with self._lock:
+            dataset = self._resident.get(version)
+            if dataset is not None:
+                self._resident.move_to_end(version)
+            return dataset
+
+    def _evict_locked(self, keep: str) -> list[str]:
+        """Evict LRU down to ``max_resident``, sparing the default and ``keep``."""
+        evicted = []
+        for version in list(self._resident):
+            if len(self._resident) <= self._max_resident:
+                break
+            if version in (self._default_version, keep):
+                continue
+            del self._resident[version]
+            evicted.append(version)
+        return evicted
+
+    def _notify_evicted(self, versions: list[str]) -> None:
+        if self._on_evict is None:
+            return
+        for version in versions:
+            self._on_evict(version)
+
+
+def available_versions() -> list[str]:
+    prefix, suffix = "emoji_index_", ".json"
+    return sorted(path.name[len(prefix) : -len(suffix)] for path in DATA_DIR.glob(f"{prefix}*{suffix}"))
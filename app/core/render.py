@@ -1,15 +1,23 @@
 from __future__ import annotations
 
+import base64
 import io
+import struct
+import zlib
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Callable, Iterable, Iterator, Optional
 
+import numpy as np
 from PIL import Image
 
+from app.core.atlas import SpriteAtlas, load_sprite
 from app.core.cache import EmojiImageCache, EmojiImageKey
 
 
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
 @dataclass(frozen=True)
 class RenderSettings:
     cell_size: int
@@ -29,18 +37,146 @@ def _load_emoji_image(path: Path, size: int, cache: EmojiImageCache) -> Image.Im
     cached = cache.get(key)
     if cached is not None:
         return cached
-    image = Image.open(path).convert("RGBA")
-    resized = image.resize((size, size), Image.Resampling.LANCZOS)
+    resized = load_sprite(path, size)
     cache.set(key, resized)
     return resized
 
 
+def _new_canvas(width: int, height: int, bg_rgb: Optional[tuple[int, int, int]], output_format: str) -> Image.Image:
+    if output_format.lower() == "jpg":
+        if bg_rgb is None:
+            raise ValueError("JPG export requires solid background")
+        return Image.new("RGB", (width, height), color=bg_rgb)
+    if bg_rgb is not None:
+        return Image.new("RGBA", (width, height), color=(*bg_rgb, 255))
+    return Image.new("RGBA", (width, height), color=(0, 0, 0, 0))
+
+
+def _paste_emoji(canvas: Image.Image, emoji_image: Image.Image, x: int, y: int) -> None:
+    if canvas.mode == "RGB":
+        canvas.paste(emoji_image.convert("RGB"), (x, y))
+    else:
+        canvas.paste(emoji_image, (x, y), mask=emoji_image)
+
+
 def render_mosaic(
     grid_indices: list[list[int]],
     asset_paths: list[Path],
     settings: RenderSettings,
     cache: EmojiImageCache,
     output_format: str,
+) -> bytes:
+    def sprite(emoji_idx: int) -> Image.Image:
+        return _load_emoji_image(asset_paths[emoji_idx], settings.cell_size, cache)
+
+    return _render_grid(grid_indices, sprite, settings, output_format)
+
+
+def render_mosaic_from_atlas(
+    grid_indices: list[list[int]],
+    atlas: SpriteAtlas,
+    settings: RenderSettings,
+    output_format: str,
+) -> bytes:
+    if atlas.cell_size != settings.cell_size:
+        raise ValueError("Atlas cell size does not match render settings")
+    sprites: dict[int, Image.Image] = {}
+
+    def sprite(emoji_idx: int) -> Image.Image:
+        image = sprites.get(emoji_idx)
+        if image is None:
+            image = atlas.image(emoji_idx)
+            sprites[emoji_idx] = image
+        return image
+
+    return _render_grid(grid_indices, sprite, settings, output_format)
+
+
+def stream_mosaic_png(
+    grid_indices: np.ndarray,
+    atlas: SpriteAtlas,
+    settings: RenderSettings,
+) -> Iterator[bytes]:
+    """Encode a PNG one row of cells at a time, for mosaics too large to hold as a canvas."""
+    if atlas.cell_size != settings.cell_size:
+        raise ValueError("Atlas cell size does not match render settings")
+    grid_h, grid_w = grid_indices.shape
+    size = settings.cell_size
+    width = grid_w * size
+    bg_rgb = _parse_hex_color(settings.bg_color) if settings.bg_mode == "solid" else None
+    sprites: dict[int, Image.Image] = {}
+
+    yield _PNG_SIGNATURE
+    yield _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, grid_h * size, 8, 6, 0, 0, 0))
+    compressor = zlib.compressobj(6)
+    for row in grid_indices.tolist():
+        strip = _new_canvas(width, size, bg_rgb, "png")
+        for col_idx, emoji_idx in enumerate(row):
+            sprite = sprites.get(emoji_idx)
+            if sprite is None:
+                sprite = atlas.image(emoji_idx)
+                sprites[emoji_idx] = sprite
+            _paste_emoji(strip, sprite, col_idx * size, 0)
+        scanlines = np.frombuffer(strip.tobytes(), dtype=np.uint8).reshape(size, width * 4)
+        # Prefix each scanline with filter type 0 (None).
+        filtered = np.hstack((np.zeros((size, 1), dtype=np.uint8), scanlines))
+        compressed = compressor.compress(filtered.tobytes())
+        if compressed:
+            yield _png_chunk(b"IDAT", compressed)
+    yield _png_chunk(b"IDAT", compressor.flush())
+    yield _png_chunk(b"IEND", b"")
+
+
+def stream_mosaic_svg(
+    grid_indices: np.ndarray,
+    asset_paths: list[Path],
+    settings: RenderSettings,
+) -> Iterator[bytes]:
+    """Stream an SVG with one ``<symbol>`` per distinct emoji and a ``<use>`` per cell."""
+    # Parse eagerly so a bad color fails before the response starts streaming.
+    bg_rgb = _parse_hex_color(settings.bg_color) if settings.bg_mode == "solid" else None
+    return _svg_chunks(grid_indices, asset_paths, settings.cell_size, bg_rgb)
+
+
+def _svg_chunks(
+    grid_indices: np.ndarray,
+    asset_paths: list[Path],
+    cell_size: int,
+    bg_rgb: Optional[tuple[int, int, int]],
+) -> Iterator[bytes]:
+    grid_h, grid_w = grid_indices.shape
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+        f'width="{grid_w * cell_size}" height="{grid_h * cell_size}" viewBox="0 0 {grid_w} {grid_h}">\n'
+    ).encode("ascii")
+    yield b"<defs>\n"
+    for emoji_idx in np.unique(grid_indices).tolist():
+        encoded = base64.b64encode(asset_paths[emoji_idx].read_bytes()).decode("ascii")
+        yield (
+            f'<symbol id="e{emoji_idx}" viewBox="0 0 1 1">'
+            f'<image width="1" height="1" xlink:href="data:image/png;base64,{encoded}"/></symbol>\n'
+        ).encode("ascii")
+    yield b"</defs>\n"
+    if bg_rgb is not None:
+        yield f'<rect width="{grid_w}" height="{grid_h}" fill="#{bg_rgb[0]:02x}{bg_rgb[1]:02x}{bg_rgb[2]:02x}"/>\n'.encode("ascii")
+    for row_idx, row in enumerate(grid_indices.tolist()):
+        yield "".join(
+            f'<use xlink:href="#e{emoji_idx}" x="{col_idx}" y="{row_idx}" width="1" height="1"/>'
+            for col_idx, emoji_idx in enumerate(row)
+        ).encode("ascii") + b"\n"
+    yield b"</svg>\n"
+
+
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+
+def _render_grid(
+    grid_indices: list[list[int]],
+    sprite: Callable[[int], Image.Image],
+    settings: RenderSettings,
+    output_format: str,
 ) -> bytes:
     grid_h = len(grid_indices)
     grid_w = len(grid_indices[0]) if grid_h else 0
@@ -48,27 +184,11 @@ def render_mosaic(
     height = grid_h * settings.cell_size
 
     bg_rgb = _parse_hex_color(settings.bg_color) if settings.bg_mode == "solid" else None
-
-    if output_format.lower() == "jpg":
-        if bg_rgb is None:
-            raise ValueError("JPG export requires solid background")
-        canvas = Image.new("RGB", (width, height), color=bg_rgb)
-    else:
-        canvas = Image.new("RGBA", (width, height), color=(0, 0, 0, 0))
-        if bg_rgb is not None:
-            background = Image.new("RGBA", (width, height), color=(*bg_rgb, 255))
-            canvas.paste(background)
+    canvas = _new_canvas(width, height, bg_rgb, output_format)
 
     for row_idx, row in enumerate(grid_indices):
         for col_idx, emoji_idx in enumerate(row):
-            asset_path = asset_paths[emoji_idx]
-            emoji_image = _load_emoji_image(asset_path, settings.cell_size, cache)
-            x = col_idx * settings.cell_size
-            y = row_idx * settings.cell_size
-            if canvas.mode == "RGB":
-                canvas.paste(emoji_image.convert("RGB"), (x, y))
-            else:
-                canvas.paste(emoji_image, (x, y), mask=emoji_image)
+            _paste_emoji(canvas, sprite(emoji_idx), col_idx * settings.cell_size, row_idx * settings.cell_size)
 
     buffer = io.BytesIO()
     if output_format.lower() == "jpg":
@@ -76,3 +196,57 @@ def render_mosaic(
     else:
         canvas.save(buffer, format="PNG")
     return buffer.getvalue()
+
+
+def render_animation(
+    frames: Iterable[tuple[np.ndarray, int]],
+    asset_paths: list[Path],
+    settings: RenderSettings,
+    cache: EmojiImageCache,
+    output_format: str,
+) -> bytes:
+    """Render (indices, duration_ms) frames to GIF or APNG; every frame is held until written."""
+    if output_format.lower() not in {"gif", "apng"}:
+        raise ValueError("Animation export supports gif or apng")
+    bg_rgb = _parse_hex_color(settings.bg_color) if settings.bg_mode == "solid" else None
+    size = settings.cell_size
+
+    def composed() -> Iterator[Image.Image]:
+        canvas: Optional[Image.Image] = None
+        blank: Optional[Image.Image] = None
+        previous: Optional[np.ndarray] = None
+        for indices, duration in frames:
+            grid_h, grid_w = indices.shape
+            if canvas is None:
+                canvas = _new_canvas(grid_w * size, grid_h * size, bg_rgb, "png")
+                blank = _new_canvas(size, size, bg_rgb, "png")
+                changed = np.ones(indices.shape, dtype=bool)
+            else:
+                changed = indices != previous
+            for row_idx, col_idx in zip(*np.nonzero(changed)):
+                x = int(col_idx) * size
+                y = int(row_idx) * size
+                canvas.paste(blank, (x, y))
+                emoji_image = _load_emoji_image(asset_paths[indices[row_idx, col_idx]], size, cache)
+                _paste_emoji(canvas, emoji_image, x, y)
+            previous = indices
+            frame = canvas.copy()
+            frame.info["duration"] = duration
+            yield frame
+
+    images = composed()
+    first = next(images, None)
+    if first is None:
+        raise ValueError("Animation has no frames")
+
+    buffer = io.BytesIO()
+    pil_format = "GIF" if output_format.lower() == "gif" else "PNG"
+    # The APNG writer walks append_images twice (to size the canvas, then to encode), so it
+    # cannot consume a generator; the GIF writer collects the frames itself.
+    append_images = list(images) if pil_format == "PNG" else images
+    save_args: dict[str, object] = {"save_all": True, "append_images": append_images, "loop": 0}
+    if pil_format == "GIF" and bg_rgb is None:
+        # GIF delta frames cannot clear pixels back to transparent without background disposal.
+        save_args["disposal"] = 2
+    first.save(buffer, format=pil_format, **save_args)
+    return buffer.getvalue()
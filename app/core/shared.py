@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Callable, Iterator
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+
+@dataclass(frozen=True)
+class SharedArraySpec:
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+
+def share_array(array: np.ndarray) -> tuple[shared_memory.SharedMemory, SharedArraySpec]:
+    """Copy ``array`` into a new shared memory segment owned by the caller."""
+    segment = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    view = np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)
+    view[...] = array
+    return segment, SharedArraySpec(name=segment.name, shape=tuple(array.shape), dtype=array.dtype.str)
+
+
+def attach_array(spec: SharedArraySpec) -> tuple[shared_memory.SharedMemory, np.ndarray]:
+    """Attach to a :func:`share_array` segment; the creator still unlinks it."""
+    segment = shared_memory.SharedMemory(name=spec.name)
+    array = np.ndarray(spec.shape, dtype=np.dtype(spec.dtype), buffer=segment.buf)
+    array.setflags(write=False)
+    return segment, array
+
+
+def open_mapped_array(path: Path, build: Callable[[], np.ndarray]) -> np.ndarray:
+    """Read-only memory map of ``path``, built once under a file lock and published atomically."""
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with _exclusive_lock(path.with_name(path.name + ".lock")):
+            if not path.exists():
+                tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+                with tmp_path.open("wb") as f:
+                    np.save(f, build())
+                os.replace(tmp_path, path)
+    return np.load(path, mmap_mode="r")
+
+
+@contextmanager
+def _exclusive_lock(lock_path: Path) -> Iterator[None]:
+    if fcntl is None:
+        # Without flock, concurrent builders race harmlessly: the rename is still atomic.
+        yield
+        return
+    with lock_path.open("a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import math
+import random
+from collections import deque
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+import numpy as np
+from PIL import Image
+
+from app.core.cache import INDEX_DTYPE, FeatureMemoCache
+from app.core.dataset import load_dataset
+from app.core.features import compute_grid_features
+from app.core.matcher import MatchWeights, match_features
+
+
+@dataclass(frozen=True)
+class Tile:
+    index: int
+    row: int
+    col: int
+    rows: int
+    cols: int
+
+
+@dataclass(frozen=True)
+class TileTask:
+    tile: Tile
+    dataset_version: str
+    image: Image.Image
+    box: tuple[float, float, float, float]
+    weights: MatchWeights
+    deterministic: bool
+    seed: Optional[int]
+
+
+_WORKER_FEATURES: Optional[dict[str, np.ndarray]] = None
+_WORKER_MEMOS: dict[str, FeatureMemoCache] = {}
+
+
+def iter_tiles(grid_w: int, grid_h: int, tile_cells: int) -> Iterator[Tile]:
+    index = 0
+    for row in range(0, grid_h, tile_cells):
+        for col in range(0, grid_w, tile_cells):
+            yield Tile(index, row, col, min(tile_cells, grid_h - row), min(tile_cells, grid_w - col))
+            index += 1
+
+
+def init_tile_worker(emoji_features: Optional[dict[str, np.ndarray]] = None) -> None:
+    """Process-pool initializer; other versions are memory-mapped on first use, one at a time."""
+    global _WORKER_FEATURES
+    _WORKER_FEATURES = dict(emoji_features or {})
+    _WORKER_MEMOS.clear()
+
+
+def _worker_features(version: str) -> tuple[np.ndarray, FeatureMemoCache]:
+    if _WORKER_FEATURES is None:
+        raise RuntimeError("Tile worker not initialized")
+    features = _WORKER_FEATURES.get(version)
+    if features is None:
+        features = load_dataset(version, mmap=True).features
+        # Keep only the version in use; switched-away datasets are mapped again if asked for.
+        _WORKER_FEATURES.clear()
+        _WORKER_MEMOS.clear()
+        _WORKER_FEATURES[version] = features
+    memo = _WORKER_MEMOS.get(version)
+    if memo is None:
+        memo = FeatureMemoCache(max_size=4096)
+        _WORKER_MEMOS[version] = memo
+    return features, memo
+
+
+def match_tile(task: TileTask) -> tuple[Tile, np.ndarray]:
+    emoji_features, memo = _worker_features(task.dataset_version)
+    tile = task.tile
+    features, _, _, _ = compute_grid_features(task.image, tile.cols, tile.rows, box=task.box)
+    rng = random.Random(task.seed) if task.seed is not None else None
+    indices = match_features(
+        features,
+        emoji_features,
+        task.weights,
+        task.deterministic,
+        rng=rng,
+        memo_cache=memo,
+    )
+    return tile, indices.astype(INDEX_DTYPE).reshape(tile.rows, tile.cols)
+
+
+def _tile_task(
+    image: Image.Image,
+    tile: Tile,
+    dataset_version: str,
+    grid_w: int,
+    grid_h: int,
+    weights: MatchWeights,
+    deterministic: bool,
+    seed: Optional[int],
+) -> TileTask:
+    width, height = image.size
+    scale_x = width / grid_w
+    scale_y = height / grid_h
+    left, top = tile.col * scale_x, tile.row * scale_y
+    right, bottom = (tile.col + tile.cols) * scale_x, (tile.row + tile.rows) * scale_y
+    # Ship the tile plus enough margin for the Lanczos kernel (3 lobes at the sample
+    # scale) so tile interiors resample exactly as the whole image would.
+    margin = math.ceil(3 * max(scale_x, scale_y)) + 1
+    crop_left = max(0, math.floor(left) - margin)
+    crop_top = max(0, math.floor(top) - margin)
+    crop_right = min(width, math.ceil(right) + margin)
+    crop_bottom = min(height, math.ceil(bottom) + margin)
+    region = image.crop((crop_left, crop_top, crop_right, crop_bottom))
+    box = (left - crop_left, top - crop_top, right - crop_left, bottom - crop_top)
+    tile_seed = None if seed is None else seed + tile.index
+    return TileTask(tile, dataset_version, region, box, weights, deterministic, tile_seed)
+
+
+def match_tiled(
+    image: Image.Image,
+    grid_w: int,
+    grid_h: int,
+    weights: MatchWeights,
+    deterministic: bool,
+    seed: Optional[int],
+    executor: Executor,
+    dataset_version: str,
+    tile_cells: int = 64,
+    max_pending: int = 8,
+) -> np.ndarray:
+    """Match a large grid tile by tile on ``executor``, with at most ``max_pending`` in flight."""
+    image = image.convert("RGBA")
+    result = np.empty((grid_h, grid_w), dtype=INDEX_DTYPE)
+    pending: deque[Future] = deque()
+
+    def drain(limit: int) -> None:
+        while len(pending) > limit:
+            tile, indices = pending.popleft().result()
+            result[tile.row : tile.row + tile.rows, tile.col : tile.col + tile.cols] = indices
+
+    for tile in iter_tiles(grid_w, grid_h, tile_cells):
+        task = _tile_task(image, tile, dataset_version, grid_w, grid_h, weights, deterministic, seed)
+        pending.append(executor.submit(match_tile, task))
+        drain(max_pending - 1)
+    drain(0)
+    return result
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Iterable, Optional
+
+WarmupStep = tuple[str, Callable[[], object]]
+
+
+class Readiness:
+    """Tracks a worker's warm-up so a readiness probe can hold traffic until it finishes."""
+
+    def __init__(self) -> None:
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._timings: dict[str, float] = {}
+        self._error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set() and self._error is None
+
+    def mark_ready(self) -> None:
+        self._done.set()
+
+    def run(self, steps: Iterable[WarmupStep]) -> None:
+        """Run ``steps`` in order; a failing step leaves the worker not ready."""
+        try:
+            for name, step in steps:
+                start = time.perf_counter()
+                step()
+                with self._lock:
+                    self._timings[name] = round((time.perf_counter() - start) * 1000, 3)
+        except Exception as exc:  # noqa: BLE001
+            with self._lock:
+                self._error = f"{name}: {exc!r}"
+        self._done.set()
+
+    def start(self, steps: Iterable[WarmupStep]) -> threading.Thread:
+        thread = threading.Thread(target=self.run, args=(steps,), name="warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            if self._error is not None:
+                state = "failed"
+            else:
+                state = "ready" if self._done.is_set() else "warming"
+            return {"status": state, "steps_ms": dict(self._timings), "error": self._error}
@@ -1,15 +1,42 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import AsyncIterator
 
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 
+from app.api.routes import CONFIG, READINESS, shutdown_tile_executor, start_warmup
 from app.api.routes import router as api_router
+from app.api.uploads import UploadLimitMiddleware
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
 
-app = FastAPI(title="Emoji Art Generator")
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    start_warmup()
+    try:
+        yield
+    finally:
+        shutdown_tile_executor()
+
+
+app = FastAPI(title="Emoji Art Generator", lifespan=lifespan)
+app.add_middleware(
+    UploadLimitMiddleware,
+    max_bytes=CONFIG.max_upload_bytes,
+    paths=("/api/convert", "/api/convert/animation"),
+)
 
 app.include_router(api_router)
+
+
+@app.get("/ready")
+async def ready() -> JSONResponse:
+    return JSONResponse(READINESS.status(), status_code=200 if READINESS.ready else 503)
+
+
 app.mount("/", StaticFiles(directory=str(ROOT_DIR / "web"), html=True), name="static")
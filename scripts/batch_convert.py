@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import random
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+from PIL import Image
+
+from app.api.schemas import CropPayload, SettingsPayload
+from app.core.atlas import SpriteAtlas, build_atlas
+from app.core.cache import FeatureMemoCache, pack_indices
+from app.core.dataset import load_dataset
+from app.core.features import compute_grid_features
+from app.core.hashing import content_key
+from app.core.matcher import MatchWeights, match_features
+from app.core.preprocess import compute_grid_size
+from app.core.render import RenderSettings, render_mosaic_from_atlas
+from app.core.shared import SharedArraySpec, attach_array, share_array
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg"}
+MANIFEST_NAME = "manifest.jsonl"
+
+
+@dataclass(frozen=True)
+class Job:
+    source: str
+    output_stem: str
+
+
+@dataclass(frozen=True)
+class WorkerConfig:
+    dataset_version: str
+    emoji_list: list[str]
+    features: SharedArraySpec
+    atlas: Optional[SharedArraySpec]
+    settings: dict
+    formats: tuple[str, ...]
+    cell_size: int
+    output_dir: str
+
+
+_WORKER: dict[str, object] = {}
+
+
+def collect_jobs(inputs: list[Path]) -> list[Job]:
+    """Expand directories and manifests into deduplicated jobs with collision-free output stems."""
+    sources: list[Path] = []
+    for entry in inputs:
+        if entry.is_dir():
+            sources.extend(path for path in sorted(entry.rglob("*")) if path.suffix.lower() in IMAGE_SUFFIXES)
+        else:
+            root = entry.parent
+            for line in entry.read_text(encoding="utf-8").splitlines():
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                path = Path(line)
+                sources.append(path if path.is_absolute() else root / path)
+
+    unique = list(dict.fromkeys(path.resolve() for path in sources))
+    if not unique:
+        return []
+    common = Path(os.path.commonpath([str(path.parent) for path in unique]))
+    stems = [path.relative_to(common).with_suffix("") for path in unique]
+    counts = Counter(stems)
+    jobs: list[Job] = []
+    for path, stem in zip(unique, stems):
+        if counts[stem] > 1:
+            digest = hashlib.blake2b(str(path).encode("utf-8"), digest_size=4).hexdigest()
+            stem = stem.with_name(f"{stem.name}-{digest}")
+        jobs.append(Job(str(path), str(stem)))
+    return jobs
+
+
+def load_completed(manifest_path: Path) -> set[str]:
+    completed: set[str] = set()
+    if not manifest_path.exists():
+        return completed
+    with manifest_path.open("r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash mid-write can leave a truncated final line; that job reruns.
+                continue
+            if record.get("status") == "ok":
+                completed.add(record["source"])
+    return completed
+
+
+def _init_worker(config: WorkerConfig) -> None:
+    segments = []
+    segment, features = attach_array(config.features)
+    segments.append(segment)
+    atlas = None
+    if config.atlas is not None:
+        segment, sprites = attach_array(config.atlas)
+        segments.append(segment)
+        atlas = SpriteAtlas(sprites)
+    _WORKER.update(
+        config=config,
+        features=features,
+        atlas=atlas,
+        segments=segments,
+        memo_cache=FeatureMemoCache(max_size=4096),
+    )
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def _convert_job(job: Job) -> dict:
+    config: WorkerConfig = _WORKER["config"]  # type: ignore[assignment]
+    features: np.ndarray = _WORKER["features"]  # type: ignore[assignment]
+    atlas: Optional[SpriteAtlas] = _WORKER["atlas"]  # type: ignore[assignment]
+    memo_cache: FeatureMemoCache = _WORKER["memo_cache"]  # type: ignore[assignment]
+
+    try:
+        image_bytes = Path(job.source).read_bytes()
+        settings = SettingsPayload.model_validate(config.settings)
+        crop = CropPayload().model_dump()
+        key = content_key(image_bytes, crop, settings.model_dump(), config.dataset_version)
+
+        with Image.open(io.BytesIO(image_bytes)) as opened:
+            image = opened.convert("RGBA")
+        grid = compute_grid_size(*image.size, settings.max_dim, settings.grid_w, settings.grid_h, settings.lock_aspect)
+        cell_features, _, _, _ = compute_grid_features(image, grid.grid_w, grid.grid_h)
+
+        rng = None
+        if settings.deterministic:
+            rng = random.Random(key.seed)
+        weights = MatchWeights(
+            color=settings.weights.color,
+            edge=settings.weights.edge,
+            alpha=settings.weights.alpha,
+            metric=settings.metric,
+        )
+        indices = match_features(cell_features, features, weights, settings.deterministic, rng=rng, memo_cache=memo_cache)
+        packed = pack_indices(indices, grid.grid_w, grid.grid_h)
+
+        outputs = []
+        base = Path(config.output_dir) / job.output_stem
+        if "text" in config.formats:
+            lines = ["".join(config.emoji_list[idx] for idx in row) for row in packed.tolist()]
+            path = base.with_suffix(".txt")
+            _write_atomic(path, ("\n".join(lines)).encode("utf-8"))
+            outputs.append(str(path))
+        if "png" in config.formats and atlas is not None:
+            render_settings = RenderSettings(cell_size=config.cell_size, bg_mode=settings.bg_mode, bg_color=settings.bg_color)
+            path = base.with_suffix(".png")
+            _write_atomic(path, render_mosaic_from_atlas(packed.tolist(), atlas, render_settings, "png"))
+            outputs.append(str(path))
+    except Exception as exc:  # noqa: BLE001
+        return {"source": job.source, "status": "error", "error": str(exc)}
+
+    return {
+        "source": job.source,
+        "status": "ok",
+        "hash": key.hash,
+        "grid_w": grid.grid_w,
+        "grid_h": grid.grid_h,
+        "outputs": outputs,
+        "warnings": grid.warnings,
+    }
+
+
+def run_batch(
+    jobs: list[Job],
+    output_dir: Path,
+    settings: SettingsPayload,
+    formats: tuple[str, ...],
+    cell_size: int,
+    dataset_version: str,
+    workers: int,
+) -> Iterator[dict]:
+    """Convert ``jobs`` across a process pool, yielding manifest records as jobs finish."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST_NAME
+    completed = load_completed(manifest_path)
+    pending = [job for job in jobs if job.source not in completed]
+    if not pending:
+        return
+
+    dataset = load_dataset(dataset_version)
+    segments = []
+    try:
+        features_segment, features_spec = share_array(np.ascontiguousarray(dataset.features))
+        segments.append(features_segment)
+        atlas_spec = None
+        if "png" in formats:
+            atlas_segment, atlas_spec = share_array(build_atlas(dataset.asset_paths, cell_size))
+            segments.append(atlas_segment)
+
+        config = WorkerConfig(
+            dataset_version=dataset.version,
+            emoji_list=dataset.emoji_list,
+            features=features_spec,
+            atlas=atlas_spec,
+            settings=settings.model_dump(),
+            formats=formats,
+            cell_size=cell_size,
+            output_dir=str(output_dir),
+        )
+        with manifest_path.open("a", encoding="utf-8") as manifest, multiprocessing.Pool(
+            processes=workers,
+            initializer=_init_worker,
+            initargs=(config,),
+        ) as pool:
+            for record in pool.imap_unordered(_convert_job, pending, chunksize=1):
+                manifest.write(json.dumps(record, ensure_ascii=False) + "\n")
+                manifest.flush()
+                os.fsync(manifest.fileno())
+                yield record
+    finally:
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Convert image directories or manifests to emoji art offline.")
+    parser.add_argument("inputs", type=Path, nargs="+", help="Image directories or manifest files (one path per line)")
+    parser.add_argument("--output", type=Path, required=True)
+    parser.add_argument("--format", dest="formats", action="append", choices=["text", "png"])
+    parser.add_argument("--max-dim", type=int, default=120)
+    parser.add_argument("--cell-size", type=int, default=48)
+    parser.add_argument("--bg-mode", choices=["transparent", "solid"], default="transparent")
+    parser.add_argument("--bg-color", default="#ffffff")
+    parser.add_argument("--dataset-version", default="v1")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    settings = SettingsPayload(max_dim=args.max_dim, bg_mode=args.bg_mode, bg_color=args.bg_color)
+    formats = tuple(args.formats or ["text"])
+    jobs = collect_jobs(args.inputs)
+
+    done = failed = 0
+    for record in run_batch(jobs, args.output, settings, formats, args.cell_size, args.dataset_version, args.workers):
+        if record["status"] == "ok":
+            done += 1
+        else:
+            failed += 1
+            print(f"Failed {record['source']}: {record['error']}")
+    skipped = len(jobs) - done - failed
+    print(f"Converted {done}, failed {failed}, skipped {skipped} already in manifest")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import asyncio
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.api.streaming import AdmittedStreamingResponse
+from app.core.cache import ConversionResult, pack_indices
+from app.main import app
+
+
+def test_failed_large_export_returns_its_admission_budget():
+    grid_w = routes.STANDARD_MAX_DIM + 1
+    routes.CONVERSION_CACHE.set(
+        "gone-dataset",
+        ConversionResult(
+            indices=pack_indices(np.zeros(grid_w, dtype=np.int32), grid_w, 1),
+            dataset_version="no-such-version",
+            preview_png=None,
+            warnings=[],
+            response_body=b"{}",
+            response_spans={},
+        ),
+    )
+
+    response = TestClient(app).get("/api/export/png", params={"hash": "gone-dataset"})
+
+    assert response.status_code == 410
+    assert routes.ADMISSION.in_use == 0
+
+
+def test_streaming_response_releases_when_the_client_leaves_before_the_body():
+    released = []
+    started = []
+
+    def chunks():
+        started.append(True)
+        yield b"never sent"
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        raise OSError("connection reset")
+
+    response = AdmittedStreamingResponse(chunks(), lambda: released.append(True), media_type="text/plain")
+    try:
+        asyncio.run(response({"type": "http", "asgi": {"spec_version": "2.4"}}, receive, send))
+    except Exception:
+        pass
+
+    assert released == [True]
+    assert started == []
@@ -0,0 +1,26 @@
+import dataclasses
+import io
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.api import routes
+from app.main import app
+
+
+def test_animation_larger_than_the_render_budget_is_rejected(monkeypatch):
+    frames = [Image.new("RGB", (64, 64), color) for color in ("red", "green", "blue")]
+    buffer = io.BytesIO()
+    frames[0].save(buffer, format="GIF", save_all=True, append_images=frames[1:], duration=50)
+    # 3 frames of a 16x16 grid at 16px per cell is 196,608 output pixels.
+    monkeypatch.setattr(routes, "CONFIG", dataclasses.replace(routes.CONFIG, max_animation_pixels=100_000))
+
+    response = TestClient(app).post(
+        "/api/convert/animation",
+        files={"file": ("anim.gif", buffer.getvalue(), "image/gif")},
+        data={"settings": '{"max_dim": 16}', "animation": '{"output": "gif", "cell_size": 16}'},
+    )
+
+    assert response.status_code == 413
+    assert "too large to render" in response.json()["detail"]
+    assert routes.ADMISSION.in_use == 0
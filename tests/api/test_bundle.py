@@ -0,0 +1,31 @@
+from fastapi.testclient import TestClient
+
+from app.core.bundle import BUNDLE_MAGIC
+from app.main import app
+
+
+def test_bundle_is_immutable_only_under_its_content_digest():
+    client = TestClient(app)
+    manifest = client.get("/api/bundle").json()
+    assert manifest["url"].endswith(f"?digest={manifest['digest']}")
+
+    plain = client.get(manifest["url"], headers={"Accept-Encoding": "gzip;q=0, identity"})
+    assert plain.content[:4] == BUNDLE_MAGIC
+    assert "content-encoding" not in plain.headers
+    assert "immutable" in plain.headers["cache-control"]
+    assert plain.headers["vary"] == "Accept-Encoding"
+
+    zipped = client.get(manifest["url"], headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert zipped.headers["etag"] != plain.headers["etag"]
+
+    revalidated = client.get(
+        manifest["url"],
+        headers={"Accept-Encoding": "gzip;q=0", "If-None-Match": plain.headers["etag"]},
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.headers["vary"] == "Accept-Encoding"
+
+    stale = client.get(f"/api/bundle/{manifest['version']}?digest=0000", headers={"Accept-Encoding": "identity"})
+    assert stale.headers["cache-control"] == "no-cache"
+    assert stale.content == plain.content
@@ -0,0 +1,42 @@
+import io
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.api import routes
+from app.main import app
+
+
+def _png() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 24), "orange").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_default_convert_body_keeps_the_inline_preview_and_fields_can_drop_it():
+    client = TestClient(app)
+    files = {"file": ("a.png", _png(), "image/png")}
+    settings = {"settings": '{"max_dim": 8}'}
+
+    full = client.post("/api/convert", files=files, data=settings).json()
+    assert full["preview_png_base64"]
+    assert full["preview_url"] == f"/api/preview/{full['hash']}"
+    assert len(full["grid"]) == full["grid_h"]
+    # The base64 preview is encoded once and served from the cache entry afterwards.
+    assert "preview_png_base64" in routes.CONVERSION_CACHE.get(full["hash"]).response_extras
+
+    lean = client.post("/api/convert?fields=hash,preview_url", files=files, data=settings).json()
+    assert lean == {"preview_url": full["preview_url"], "hash": full["hash"]}
+
+
+def test_oversized_upload_is_refused_from_its_content_length():
+    client = TestClient(app)
+    body = b"x" * (routes.CONFIG.max_upload_bytes + 128 * 1024)
+
+    response = client.post(
+        "/api/convert",
+        content=body,
+        headers={"Content-Type": "multipart/form-data; boundary=unused"},
+    )
+
+    assert response.status_code == 413
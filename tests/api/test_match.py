@@ -0,0 +1,16 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def test_match_maps_colours_and_rejects_out_of_range_vectors():
+    client = TestClient(app)
+
+    matched = client.post("/api/match", json={"vectors": [[255, 255, 255], [0, 0, 0]], "output": "both"})
+    assert matched.status_code == 200
+    body = matched.json()
+    assert len(body["indices"]) == len(body["emoji"]) == 2
+
+    for space, vector in (("features", [1e30, 0, 0, 0, 1]), ("rgb", [256, 0, 0]), ("lab", [50, 0, -200])):
+        rejected = client.post("/api/match", json={"space": space, "vectors": [vector]})
+        assert rejected.status_code == 400
@@ -0,0 +1,58 @@
+import dataclasses
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.api import routes
+from app.core.warmup import Readiness
+
+
+@pytest.fixture
+def readiness(monkeypatch):
+    fresh = Readiness()
+    monkeypatch.setattr(routes, "READINESS", fresh)
+    monkeypatch.setattr(main, "READINESS", fresh)
+    monkeypatch.setattr(routes, "CONFIG", dataclasses.replace(routes.CONFIG, warmup=True))
+    return fresh
+
+
+def _wait_until_done(client, readiness):
+    deadline = time.monotonic() + 5
+    while readiness.status()["status"] == "warming" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return client.get("/ready")
+
+
+def test_ready_is_503_while_warming_and_200_after(monkeypatch, readiness):
+    gate = threading.Event()
+    monkeypatch.setattr(routes, "_warmup_steps", lambda: [("gate", gate.wait)])
+
+    with TestClient(main.app) as client:
+        warming = client.get("/ready")
+        assert warming.status_code == 503
+        assert warming.json()["status"] == "warming"
+
+        gate.set()
+        ready = _wait_until_done(client, readiness)
+        assert ready.status_code == 200
+        assert ready.json()["status"] == "ready"
+        assert "gate" in ready.json()["steps_ms"]
+
+
+def test_ready_stays_503_when_a_warmup_step_fails(monkeypatch, readiness):
+    def broken():
+        raise RuntimeError("atlas missing")
+
+    monkeypatch.setattr(routes, "_warmup_steps", lambda: [("ok", lambda: None), ("sprites", broken)])
+
+    with TestClient(main.app) as client:
+        failed = _wait_until_done(client, readiness)
+
+    assert failed.status_code == 503
+    body = failed.json()
+    assert body["status"] == "failed"
+    assert body["error"].startswith("sprites:")
+    assert "ok" in body["steps_ms"]
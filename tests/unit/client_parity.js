@@ -0,0 +1,33 @@
+// Driven by test_client_parity.py: runs the web client's matcher over a bundle and pixel buffer.
+const fs = require('fs');
+const path = require('path');
+
+const matcher = require(path.join(__dirname, '..', '..', 'web', 'matcher.js'));
+
+const [bundlePath, inputPath] = process.argv.slice(2);
+const bundleBytes = fs.readFileSync(bundlePath);
+const buffer = bundleBytes.buffer.slice(bundleBytes.byteOffset, bundleBytes.byteOffset + bundleBytes.byteLength);
+const bundle = matcher.parseBundle(buffer);
+const input = JSON.parse(fs.readFileSync(inputPath, 'utf8'));
+
+const rgba = Uint8ClampedArray.from(Buffer.from(input.pixels, 'base64'));
+const features = matcher.computeGridFeatures(rgba, input.grid_w, input.grid_h);
+const indices = {};
+for (const metric of ['euclidean', 'ciede2000']) {
+  const weights = { ...input.weights, metric };
+  indices[metric] = Array.from(matcher.matchFeatures(features, bundle.features, weights, false));
+}
+const gridSizes = input.grid_sizes.map(([width, height, maxDim, gridW, gridH]) => {
+  const size = matcher.computeGridSize(width, height, maxDim, gridW, gridH);
+  return [size.gridW, size.gridH];
+});
+
+process.stdout.write(
+  JSON.stringify({
+    version: bundle.version,
+    emoji_count: bundle.emojiList.length,
+    features: Array.from(features),
+    indices,
+    grid_sizes: gridSizes,
+  }),
+);
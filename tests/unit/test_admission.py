@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+from app.core.admission import AdmissionController, AdmissionRejected, estimate_cost
+
+
+def test_estimate_cost_grows_with_render_size():
+    assert estimate_cost(cells=14400) < estimate_cost(cells=14400, cell_size=48)
+    assert estimate_cost(cells=100, pixels=4_000_000) == pytest.approx(0.1 + 4.0)
+
+
+def test_admission_queues_then_sheds():
+    async def scenario():
+        controller = AdmissionController(budget=10, max_wait=0.05, max_queue=1)
+        release = await controller.acquire(8)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire(5)
+        assert rejected.value.retry_after >= 1
+        assert controller.in_use == 8
+
+        waiter = asyncio.ensure_future(controller.acquire(5))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected):
+            await controller.acquire(1)  # queue is full
+        release()
+        second_release = await waiter
+        assert controller.in_use == 5
+        second_release()
+        second_release()
+        assert controller.in_use == 0
+
+        async with controller.admit(50):  # clamped to the whole budget
+            assert controller.in_use == 10
+
+    asyncio.run(scenario())
@@ -0,0 +1,41 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+from app.core.animation import iter_frames, match_frames
+from app.core.matcher import MatchWeights
+
+
+def _gif_bytes(colors):
+    frames = [Image.new("RGB", (8, 8), color=color) for color in colors]
+    buffer = io.BytesIO()
+    frames[0].save(buffer, format="GIF", save_all=True, append_images=frames[1:], duration=50, loop=0)
+    return buffer.getvalue()
+
+
+def test_match_frames_rematches_only_changed_cells():
+    emoji_features = np.array(
+        [
+            [30.0, 0.0, 0.0, 0.0, 1.0],
+            [90.0, 0.0, 0.0, 0.0, 1.0],
+        ],
+        dtype=np.float32,
+    )
+    image = Image.open(io.BytesIO(_gif_bytes([(60, 60, 60), (61, 60, 60), (250, 250, 250)])))
+    frames = list(
+        match_frames(
+            iter_frames(image, (0, 0, 8, 8), max_frames=10),
+            grid_w=2,
+            grid_h=2,
+            emoji_features=emoji_features,
+            weights=MatchWeights(),
+            deterministic=True,
+            threshold=2.0,
+        )
+    )
+
+    assert [frame.rematched for frame in frames] == [4, 0, 4]
+    assert frames[0].duration == 50
+    assert (frames[1].indices == frames[0].indices).all()
+    assert (frames[2].indices == 1).all()
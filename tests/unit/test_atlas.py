@@ -0,0 +1,52 @@
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from app.core.atlas import SpriteAtlas, build_atlas
+from app.core.cache import EmojiImageCache
+from app.core.render import RenderSettings, render_mosaic, render_mosaic_from_atlas
+from app.core.shared import attach_array, open_mapped_array, share_array
+
+
+def test_atlas_render_matches_path_render(tmp_path: Path):
+    red = tmp_path / "red.png"
+    half = tmp_path / "half.png"
+    Image.new("RGBA", (4, 4), color=(255, 0, 0, 255)).save(red)
+    Image.new("RGBA", (4, 4), color=(0, 0, 255, 128)).save(half)
+    asset_paths = [red, half]
+    grid = [[0, 1], [1, 0]]
+    settings = RenderSettings(cell_size=6, bg_mode="solid", bg_color="#102030")
+
+    atlas = SpriteAtlas(build_atlas(asset_paths, 6))
+    expected = render_mosaic(grid, asset_paths, settings, EmojiImageCache(max_size=4), "png")
+    assert render_mosaic_from_atlas(grid, atlas, settings, "png") == expected
+
+
+def test_shared_array_roundtrip():
+    source = np.arange(24, dtype=np.float32).reshape(4, 6)
+    segment, spec = share_array(source)
+    try:
+        attached_segment, attached = attach_array(spec)
+        assert np.array_equal(attached, source)
+        assert not attached.flags.writeable
+        del attached
+        attached_segment.close()
+    finally:
+        segment.close()
+        segment.unlink()
+
+
+def test_open_mapped_array_builds_once(tmp_path: Path):
+    calls = []
+
+    def build():
+        calls.append(1)
+        return np.ones((2, 3), dtype=np.uint8)
+
+    path = tmp_path / "shared" / "array.npy"
+    first = open_mapped_array(path, build)
+    second = open_mapped_array(path, build)
+    assert len(calls) == 1
+    assert np.array_equal(first, second)
+    assert not second.flags.writeable
@@ -0,0 +1,48 @@
+import json
+
+from PIL import Image
+
+from app.api.schemas import SettingsPayload
+from scripts.batch_convert import MANIFEST_NAME, collect_jobs, run_batch
+
+
+def _image(path, color):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.new("RGB", (16, 12), color).save(path)
+    return path
+
+
+def test_same_named_inputs_get_distinct_outputs(tmp_path):
+    first = _image(tmp_path / "a" / "cat.png", "red")
+    second = _image(tmp_path / "b" / "cat.png", "blue")
+    sibling = _image(tmp_path / "b" / "cat.jpg", "green")
+    manifest = tmp_path / "list.txt"
+    manifest.write_text(f"{first}\n{second}\n", encoding="utf-8")
+
+    jobs = collect_jobs([manifest, tmp_path / "b"])
+
+    assert [job.source for job in jobs] == [str(first.resolve()), str(second.resolve()), str(sibling.resolve())]
+    stems = [job.output_stem for job in jobs]
+    assert stems[0] == "a/cat"
+    assert len(set(stems)) == 3
+
+
+def test_batch_writes_text_and_png_then_resumes(tmp_path):
+    first = _image(tmp_path / "in" / "one.png", "red")
+    _image(tmp_path / "in" / "two.png", "blue")
+    output = tmp_path / "out"
+    settings = SettingsPayload(max_dim=4)
+    jobs = collect_jobs([tmp_path / "in"])
+
+    records = list(run_batch(jobs[:1], output, settings, ("text", "png"), 8, "v1", workers=1))
+    assert [record["status"] for record in records] == ["ok"]
+    assert records[0]["source"] == str(first.resolve())
+    assert (output / "one.txt").read_text(encoding="utf-8")
+    with Image.open(output / "one.png") as rendered:
+        assert rendered.size == (records[0]["grid_w"] * 8, records[0]["grid_h"] * 8)
+
+    resumed = list(run_batch(jobs, output, settings, ("text", "png"), 8, "v1", workers=1))
+    assert [record["source"] for record in resumed] == [jobs[1].source]
+    lines = (output / MANIFEST_NAME).read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["status"] for line in lines] == ["ok", "ok"]
+    assert list(run_batch(jobs, output, settings, ("text",), 8, "v1", workers=1)) == []
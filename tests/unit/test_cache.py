@@ -0,0 +1,20 @@
+import numpy as np
+
+from app.core.cache import ConversionResult, pack_indices, text_rows
+
+
+def test_conversion_result_derives_views_from_indices():
+    indices = pack_indices(np.array([0, 1, 1, 0], dtype=np.int32), grid_w=2, grid_h=2)
+    result = ConversionResult(
+        indices=indices,
+        dataset_version="v1",
+        preview_png=None,
+        warnings=[],
+        response_body=b"{}",
+        response_spans={},
+    )
+    assert indices.dtype == np.uint16
+    assert (result.grid_w, result.grid_h) == (2, 2)
+    assert result.rows(["a", "b"]) == ["ab", "ba"]
+    assert result.spaced_rows(["a", "b"]) == ["a b", "b a"]
+    assert text_rows(indices, ["a", "b"]) == (result.rows(["a", "b"]), result.spaced_rows(["a", "b"]))
@@ -0,0 +1,26 @@
+from app.api.caching import accepts_encoding, etag_matches, export_etag
+
+
+def test_export_etag_depends_on_params():
+    base = export_etag("abc", "png", {"bg": "transparent", "color": "#ffffff"})
+    assert base == export_etag("abc", "png", {"color": "#ffffff", "bg": "transparent"})
+    assert base != export_etag("abc", "png", {"bg": "solid", "color": "#ffffff"})
+    assert base != export_etag("abd", "png", {"bg": "transparent", "color": "#ffffff"})
+
+
+def test_etag_matches_list_weak_and_wildcard():
+    etag = export_etag("abc", "text", {"spaced": False})
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_accepts_encoding_honours_q_values_and_wildcards():
+    assert accepts_encoding("gzip, deflate, br", "gzip")
+    assert accepts_encoding("br;q=1.0, GZIP;q=0.5", "gzip")
+    assert not accepts_encoding("gzip;q=0", "gzip")
+    assert not accepts_encoding("gzip;q=0, *;q=1", "gzip")
+    assert accepts_encoding("*", "gzip")
+    assert not accepts_encoding("identity", "gzip")
+    assert not accepts_encoding(None, "gzip")
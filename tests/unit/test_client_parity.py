@@ -0,0 +1,68 @@
+import base64
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.core.bundle import encode_bundle
+from app.core.dataset import load_dataset
+from app.core.features import compute_grid_features
+from app.core.matcher import MatchWeights, match_features
+from app.core.preprocess import compute_grid_size
+
+NODE = shutil.which("node")
+DRIVER = Path(__file__).with_name("client_parity.js")
+
+
+@pytest.mark.skipif(NODE is None, reason="node is not installed")
+def test_client_matcher_matches_server(tmp_path: Path):
+    dataset = load_dataset("v1")
+    sprites = np.zeros((len(dataset.emoji_list), 1, 1, 4), dtype=np.uint8)
+    (tmp_path / "bundle.bin").write_bytes(
+        encode_bundle(dataset.version, dataset.emoji_list, dataset.features, sprites)
+    )
+
+    # Pixels are already at the sampling resolution, so both sides skip resampling.
+    grid_w, grid_h = 12, 8
+    rng = np.random.default_rng(11)
+    gradient = np.linspace(0, 255, grid_w * 4)[None, :, None] * np.array([1.0, 0.4, 0.8])
+    noise = rng.normal(0, 25, (grid_h * 4, grid_w * 4, 3))
+    rgb = np.clip(gradient + noise, 0, 255).astype(np.uint8)
+    alpha = np.where(rng.random((grid_h * 4, grid_w * 4)) < 0.15, 0, 255).astype(np.uint8)
+    pixels = np.dstack([rgb, alpha])
+    weights = MatchWeights(color=1.0, edge=0.2, alpha=0.1)
+    grid_sizes = [[300, 200, 120, None, None], [200, 301, 64, None, None], [500, 90, 120, 40, None], [90, 500, 30, None, 45]]
+    (tmp_path / "input.json").write_text(
+        json.dumps(
+            {
+                "pixels": base64.b64encode(pixels.tobytes()).decode("ascii"),
+                "grid_w": grid_w,
+                "grid_h": grid_h,
+                "weights": {"color": weights.color, "edge": weights.edge, "alpha": weights.alpha},
+                "grid_sizes": grid_sizes,
+            }
+        )
+    )
+
+    completed = subprocess.run(
+        [NODE, str(DRIVER), str(tmp_path / "bundle.bin"), str(tmp_path / "input.json")],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    client = json.loads(completed.stdout)
+
+    features, _, _, _ = compute_grid_features(Image.fromarray(pixels, "RGBA"), grid_w, grid_h)
+    assert client["version"] == dataset.version
+    assert client["emoji_count"] == len(dataset.emoji_list)
+    assert np.allclose(np.array(client["features"]).reshape(-1, 5), features, atol=1e-3)
+    for metric in ("euclidean", "ciede2000"):
+        expected = match_features(features, dataset.features, MatchWeights(metric=metric), deterministic=False)
+        assert client["indices"][metric] == expected.tolist(), metric
+    for (width, height, max_dim, req_w, req_h), size in zip(grid_sizes, client["grid_sizes"]):
+        result = compute_grid_size(width, height, max_dim, req_w, req_h, True)
+        assert size == [result.grid_w, result.grid_h]
@@ -0,0 +1,7 @@
+from app.core.config import load_config
+
+
+def test_tile_pool_defaults_to_a_share_of_the_cpus():
+    assert 1 <= load_config({}).tile_workers <= 4
+    assert load_config({"WEB_CONCURRENCY": "100000"}).tile_workers == 1
+    assert load_config({"EMOJI_TILE_WORKERS": "6", "WEB_CONCURRENCY": "8"}).tile_workers == 6
@@ -2,6 +2,8 @@ import random
 
 import numpy as np
 
+from app.core.cache import FeatureMemoCache
+from app.core.features import ciede2000
 from app.core.matcher import MatchWeights, match_features
 
 
@@ -22,3 +24,44 @@ def test_match_features_deterministic_tie():
     second = match_features(cell_features, emoji_features, weights, deterministic=True, rng=rng)
 
     assert first[0] == second[0]
+
+
+def test_ciede2000_metric_matches_brute_force_and_keeps_its_own_memo():
+    rng = np.random.default_rng(3)
+    emoji_features = np.column_stack(
+        [rng.uniform(0, 100, 12), rng.uniform(-60, 60, 12), rng.uniform(-60, 60, 12), np.zeros(12), np.ones(12)]
+    ).astype(np.float32)
+    cell_features = np.column_stack(
+        [rng.uniform(0, 100, 40), rng.uniform(-60, 60, 40), rng.uniform(-60, 60, 40), np.zeros(40), np.ones(40)]
+    ).astype(np.float32)
+    perceptual = MatchWeights(metric="ciede2000")
+
+    memo = FeatureMemoCache(max_size=256)
+    matched = match_features(cell_features, emoji_features, perceptual, deterministic=False, memo_cache=memo)
+    brute = ciede2000(emoji_features[None, :, 0:3], cell_features[:, None, 0:3]).argmin(axis=1)
+    assert np.array_equal(matched, brute)
+
+    euclidean = match_features(cell_features, emoji_features, MatchWeights(), deterministic=False)
+    assert np.array_equal(
+        match_features(cell_features, emoji_features, MatchWeights(), deterministic=False, memo_cache=memo),
+        euclidean,
+    )
+
+
+def test_batched_match_agrees_with_per_cell_matching_and_memo_tracks_weights():
+    rng = np.random.default_rng(5)
+    emoji_features = rng.uniform(0, 50, (300, 5)).astype(np.float32)
+    cell_features = rng.uniform(0, 50, (600, 5)).astype(np.float32)
+    weights = MatchWeights()
+
+    batched = match_features(cell_features, emoji_features, weights, deterministic=False)
+    per_cell = [match_features(cell[None, :], emoji_features, weights, deterministic=False)[0] for cell in cell_features]
+    assert np.array_equal(batched, per_cell)
+
+    memo = FeatureMemoCache(max_size=1024)
+    match_features(cell_features, emoji_features, weights, deterministic=False, memo_cache=memo)
+    color_only = MatchWeights(edge=0.0, alpha=0.0)
+    assert np.array_equal(
+        match_features(cell_features, emoji_features, color_only, deterministic=False, memo_cache=memo),
+        match_features(cell_features, emoji_features, color_only, deterministic=False),
+    )
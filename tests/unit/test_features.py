@@ -1,7 +1,7 @@
 import numpy as np
 from PIL import Image
 
-from app.core.features import compute_image_feature, rgb_to_lab
+from app.core.features import ciede2000, compute_image_feature, rgb_to_lab, vectors_to_features
 
 
 def test_rgb_to_lab_shape():
@@ -16,3 +16,22 @@ def test_compute_image_feature_edges():
     assert feature.shape == (5,)
     assert feature[3] < 1e-6
     assert abs(feature[4] - 1.0) < 1e-6
+
+
+def test_ciede2000_matches_reference_pairs():
+    # Reference pairs from Sharma, Wu & Dalal (2005).
+    lab_a = np.array(
+        [[50.0, 2.6772, -79.7751], [50.0, 3.1571, -77.2803], [50.0, 2.5, 0.0], [60.2574, -34.0099, 36.2677]]
+    )
+    lab_b = np.array([[50.0, 0.0, -82.7485], [50.0, 0.0, -82.7485], [73.0, 25.0, -18.0], [60.4626, -34.1751, 39.4387]])
+    expected = np.array([2.0425, 2.8615, 27.1492, 1.2644])
+    assert np.allclose(ciede2000(lab_a, lab_b), expected, atol=1e-4)
+    assert np.allclose(ciede2000(lab_a, lab_a), 0.0)
+
+
+def test_vectors_to_features_treats_colours_as_flat_opaque_cells():
+    features = vectors_to_features(np.array([[255, 255, 255], [0, 0, 0]]), "rgb")
+    assert features.shape == (2, 5)
+    assert np.allclose(features[:, 0], [100.0, 0.0], atol=0.01)
+    assert np.array_equal(features[:, 3:], [[0.0, 1.0], [0.0, 1.0]])
+    assert np.array_equal(vectors_to_features(np.array([[50, 10, -10]]), "lab")[0], [50, 10, -10, 0, 1])
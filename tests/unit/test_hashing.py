@@ -0,0 +1,18 @@
+from app.core.hashing import ContentHasher, content_key, stable_hash
+
+
+def test_incremental_hasher_matches_one_shot_key():
+    data = bytes(range(256)) * 300
+    hasher = ContentHasher()
+    for start in range(0, len(data), 4096):
+        hasher.update(data[start : start + 4096])
+    crop = {"x": 0, "y": 0, "w": 10, "h": 10}
+    settings = {"max_dim": 40}
+
+    key = hasher.finalize(crop, settings, "v1")
+    assert hasher.size == len(data)
+    assert key == content_key(data, crop, settings, "v1")
+    assert key.hash == stable_hash(data, crop, settings, "v1")
+    # Finalizing does not consume the state, so other payloads can reuse the upload hash.
+    assert hasher.finalize(crop, {"max_dim": 60}, "v1").hash != key.hash
+    assert hasher.finalize(crop, settings, "v1") == key
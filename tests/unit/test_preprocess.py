@@ -13,3 +13,9 @@ def test_compute_grid_size_clamp():
     assert result.grid_w == 120
     assert result.grid_h == 10
     assert any("clamped" in warning for warning in result.warnings)
+
+
+def test_compute_grid_size_large_grid_cap():
+    result = compute_grid_size(width=2000, height=1000, max_dim=800, grid_w=None, grid_h=None, lock_aspect=True, hard_cap=1000)
+    assert result.grid_w == 800
+    assert result.grid_h == 400
@@ -0,0 +1,29 @@
+import json
+
+from app.core.profiling import PSTATS_FILE, TIMELINE_FILE, profile_path, profile_request, profiled_call, stage
+
+
+def test_profile_request_records_stages_and_artifacts(tmp_path):
+    with stage("ignored"):
+        pass
+
+    with profile_request(tmp_path, "POST /api/convert") as profile:
+        with stage("match"):
+            assert profiled_call(sum, range(1000)) == 499500
+
+    timeline = json.loads(profile_path(tmp_path, profile.request_id, TIMELINE_FILE).read_text())
+    assert [entry["stage"] for entry in timeline["stages"]] == ["match"]
+    assert timeline["label"] == "POST /api/convert"
+    assert profile_path(tmp_path, profile.request_id, PSTATS_FILE) is not None
+    assert profile_path(tmp_path, "../" + profile.request_id, TIMELINE_FILE) is None
+
+
+def test_profile_request_keeps_only_the_newest_profiles(tmp_path):
+    request_ids = []
+    for _ in range(3):
+        with profile_request(tmp_path, "GET /api/export/png", keep=2) as profile:
+            pass
+        request_ids.append(profile.request_id)
+
+    assert profile_path(tmp_path, request_ids[0], TIMELINE_FILE) is None
+    assert all(profile_path(tmp_path, request_id, TIMELINE_FILE) for request_id in request_ids[1:])
@@ -0,0 +1,44 @@
+import numpy as np
+
+from app.core.dataset import EmojiDataset
+from app.core.registry import DatasetRegistry
+
+
+def _fake_loader(loaded):
+    def load(version):
+        loaded.append(version)
+        return EmojiDataset(version, ["x"], [], np.zeros((1, 5), dtype=np.float32))
+
+    return load
+
+
+def test_registry_loads_lazily_and_evicts_lru_but_keeps_default():
+    loaded, evicted = [], []
+    registry = DatasetRegistry("v1", max_resident=2, loader=_fake_loader(loaded), on_evict=evicted.append)
+
+    assert registry.get().version == "v1"
+    registry.get("v2")
+    registry.get("v1")
+    registry.get("v3")
+    assert evicted == ["v2"]
+    assert registry.resident_versions() == ["v1", "v3"]
+
+    registry.set_default("v3")
+    registry.get("v4")
+    assert registry.default_version == "v3"
+    assert evicted == ["v2", "v1"]
+    assert loaded == ["v1", "v2", "v3", "v4"]
+
+
+def test_registry_switches_default_with_a_single_resident_slot():
+    loaded, evicted = [], []
+    registry = DatasetRegistry("v1", max_resident=1, loader=_fake_loader(loaded), on_evict=evicted.append)
+
+    registry.get()
+    assert registry.get("v2").version == "v2"
+    assert registry.resident_versions() == ["v1", "v2"]
+
+    assert registry.set_default("v2").version == "v2"
+    assert registry.default_version == "v2"
+    assert registry.resident_versions() == ["v2"]
+    assert evicted == ["v1"]
@@ -1,10 +1,11 @@
 import io
 from pathlib import Path
 
+import numpy as np
 from PIL import Image
 
 from app.core.cache import EmojiImageCache
-from app.core.render import RenderSettings, render_mosaic
+from app.core.render import RenderSettings, render_animation, render_mosaic, stream_mosaic_svg
 
 
 def test_render_png_transparency(tmp_path: Path):
@@ -40,3 +41,40 @@ def test_render_jpg_solid_background(tmp_path: Path):
     image = Image.open(io.BytesIO(jpg_bytes))
     assert image.mode == "RGB"
     assert image.size == (8, 8)
+
+
+def test_render_animation_repaints_changed_cells(tmp_path: Path):
+    red = tmp_path / "red.png"
+    clear = tmp_path / "clear.png"
+    Image.new("RGBA", (1, 1), color=(255, 0, 0, 255)).save(red)
+    Image.new("RGBA", (1, 1), color=(0, 0, 0, 0)).save(clear)
+
+    frames = [(np.array([[0, 1]]), 50), (np.array([[1, 0]]), 70)]
+    settings = RenderSettings(cell_size=8, bg_mode="transparent", bg_color="#ffffff")
+
+    for output_format in ("gif", "apng"):
+        data = render_animation(iter(frames), [red, clear], settings, EmojiImageCache(max_size=4), output_format)
+        image = Image.open(io.BytesIO(data))
+        assert image.n_frames == 2
+        image.seek(1)
+        second = image.convert("RGBA")
+        assert second.getpixel((2, 2))[3] == 0
+        assert second.getpixel((10, 2)) == (255, 0, 0, 255)
+
+
+def test_stream_mosaic_svg_embeds_each_used_emoji_once(tmp_path: Path):
+    asset_paths = []
+    for idx, color in enumerate([(255, 0, 0, 255), (0, 255, 0, 255), (0, 0, 255, 255)]):
+        path = tmp_path / f"{idx}.png"
+        Image.new("RGBA", (2, 2), color=color).save(path)
+        asset_paths.append(path)
+    grid = np.array([[0, 2, 0], [2, 2, 0]], dtype=np.uint16)
+    settings = RenderSettings(cell_size=48, bg_mode="solid", bg_color="#FFCC00")
+
+    svg = b"".join(stream_mosaic_svg(grid, asset_paths, settings)).decode("ascii")
+
+    assert 'width="144" height="96" viewBox="0 0 3 2"' in svg
+    assert svg.count("<symbol ") == 2
+    assert 'id="e1"' not in svg
+    assert svg.count("<use ") == 6
+    assert 'fill="#ffcc00"' in svg
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from app.api.responses import (
+    DEFAULT_RESPONSE_FIELDS,
+    STORED_RESPONSE_FIELDS,
+    assemble_body,
+    encode_preview_member,
+    parse_fields,
+    serialize_response,
+)
+
+
+def test_serialized_body_and_subsets_are_valid_json():
+    body, spans = serialize_response("abc", 2, 1, ["😀😀"], ["😀 😀"], True, ["note"])
+    assert json.loads(body) == {
+        "grid_w": 2,
+        "grid_h": 1,
+        "grid": ["😀😀"],
+        "grid_spaced": ["😀 😀"],
+        "preview_url": "/api/preview/abc",
+        "hash": "abc",
+        "warnings": ["note"],
+    }
+    assert assemble_body(body, spans, STORED_RESPONSE_FIELDS) == body
+
+    default = assemble_body(
+        body,
+        spans,
+        DEFAULT_RESPONSE_FIELDS,
+        {"preview_png_base64": encode_preview_member(b"png")},
+    )
+    assert json.loads(default)["preview_png_base64"] == "cG5n"
+
+    subset = assemble_body(
+        body,
+        spans,
+        ("grid", "preview_png_base64", "hash"),
+        {"preview_png_base64": encode_preview_member(b"png")},
+    )
+    assert json.loads(subset) == {"grid": ["😀😀"], "preview_png_base64": "cG5n", "hash": "abc"}
+
+
+def test_parse_fields_subset_and_unknown():
+    assert parse_fields("hash, grid_w") == ("grid_w", "hash")
+    with pytest.raises(ValueError):
+        parse_fields("grid,bogus")
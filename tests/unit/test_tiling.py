@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from app.core.features import compute_grid_features
+from app.core.matcher import MatchWeights, match_features
+from app.core.tiling import init_tile_worker, iter_tiles, match_tiled
+
+
+def test_iter_tiles_covers_grid():
+    tiles = list(iter_tiles(grid_w=5, grid_h=3, tile_cells=2))
+    covered = np.zeros((3, 5), dtype=int)
+    for tile in tiles:
+        covered[tile.row : tile.row + tile.rows, tile.col : tile.col + tile.cols] += 1
+    assert (covered == 1).all()
+    assert [tile.index for tile in tiles] == list(range(len(tiles)))
+
+
+def test_match_tiled_matches_whole_image():
+    emoji_features = np.array(
+        [
+            [20.0, 0.0, 0.0, 0.0, 1.0],
+            [50.0, 40.0, 20.0, 0.0, 1.0],
+            [90.0, 0.0, 0.0, 0.0, 1.0],
+        ],
+        dtype=np.float32,
+    )
+    image = Image.new("RGBA", (48, 32), color=(240, 240, 240, 255))
+    image.paste((200, 30, 30, 255), (0, 0, 24, 32))
+
+    features, _, _, _ = compute_grid_features(image, 6, 4)
+    expected = match_features(features, emoji_features, MatchWeights(), deterministic=False).reshape(4, 6)
+
+    with ThreadPoolExecutor(max_workers=2, initializer=init_tile_worker, initargs=({"test": emoji_features},)) as executor:
+        tiled = match_tiled(image, 6, 4, MatchWeights(), False, None, executor, "test", tile_cells=3, max_pending=2)
+
+    assert tiled.dtype == np.uint16
+    assert np.array_equal(tiled, expected)
+
+
+def test_tile_worker_keeps_only_the_active_dataset():
+    from app.core import tiling
+
+    init_tile_worker({"test": np.zeros((1, 5), dtype=np.float32)})
+    features, _ = tiling._worker_features("v1")
+
+    assert list(tiling._WORKER_FEATURES) == ["v1"]
+    assert features.shape[1] == 5
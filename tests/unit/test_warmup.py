@@ -0,0 +1,17 @@
+from app.core.warmup import Readiness
+
+
+def test_readiness_flips_after_steps_and_stays_down_on_failure():
+    readiness = Readiness()
+    assert not readiness.ready
+    readiness.run([("one", lambda: None), ("two", lambda: None)])
+    assert readiness.ready
+    assert list(readiness.status()["steps_ms"]) == ["one", "two"]
+
+    failing = Readiness()
+    failing.run([("boom", lambda: 1 / 0), ("never", lambda: None)])
+    assert not failing.ready
+    status = failing.status()
+    assert status["status"] == "failed"
+    assert status["error"].startswith("boom:")
+    assert "never" not in status["steps_ms"]
@@ -1,4 +1,4 @@
-/* global Cropper */
+/* global Cropper, EmojiMatcher */
 const fileInput = document.getElementById('fileInput');
 const cropImage = document.getElementById('cropImage');
 const cropPlaceholder = document.getElementById('cropPlaceholder');
@@ -16,6 +16,7 @@ const gridHEl = document.getElementById('gridH');
 const lockAspectEl = document.getElementById('lockAspect');
 const deterministicEl = document.getElementById('deterministic');
 const ditheringEl = document.getElementById('dithering');
+const metricEl = document.getElementById('metric');
 const bgModeEl = document.getElementById('bgMode');
 const bgColorEl = document.getElementById('bgColor');
 const weightColorEl = document.getElementById('weightColor');
@@ -25,12 +26,18 @@ const weightAlphaEl = document.getElementById('weightAlpha');
 const exportTextBtn = document.getElementById('exportText');
 const exportTextSpacedBtn = document.getElementById('exportTextSpaced');
 const exportPngBtn = document.getElementById('exportPng');
+const exportSvgBtn = document.getElementById('exportSvg');
 const exportJpgBtn = document.getElementById('exportJpg');
 
+const SAMPLE = 4;
+const SPRITE_SHEET_COLUMNS = 64;
+
 let cropper = null;
 let lastHash = null;
 let imageReady = false;
 let lastImageSize = { width: 0, height: 0 };
+let bundlePromise = null;
+let previewTimer = null;
 
 function setStatus(message) {
   statusEl.textContent = message;
@@ -44,9 +51,9 @@ function setWarnings(warnings) {
   warningsEl.innerHTML = warnings.map((warning) => `<div>• ${warning}</div>`).join('');
 }
 
-function updatePreview(base64) {
-  if (base64) {
-    previewImage.src = `data:image/png;base64,${base64}`;
+function updatePreview(url) {
+  if (url) {
+    previewImage.src = url;
     previewImage.style.display = 'block';
     previewPlaceholder.style.display = 'none';
   } else {
@@ -56,10 +63,147 @@ function updatePreview(base64) {
   }
 }
 
+function loadBundle() {
+  if (!bundlePromise) {
+    bundlePromise = fetch('/api/bundle')
+      .then((response) => response.json())
+      .then((manifest) => fetch(manifest.url))
+      .then((response) => {
+        if (!response.ok) throw new Error('Bundle unavailable');
+        return response.arrayBuffer();
+      })
+      .then((buffer) => EmojiMatcher.parseBundle(buffer))
+      .catch((err) => {
+        bundlePromise = null;
+        throw err;
+      });
+  }
+  return bundlePromise;
+}
+
+function spriteSheet(bundle) {
+  if (!bundle.sheet) {
+    const size = bundle.spriteSize;
+    const rows = Math.ceil(bundle.count / SPRITE_SHEET_COLUMNS);
+    const sheet = document.createElement('canvas');
+    sheet.width = SPRITE_SHEET_COLUMNS * size;
+    sheet.height = rows * size;
+    const ctx = sheet.getContext('2d');
+    for (let idx = 0; idx < bundle.count; idx += 1) {
+      const pixels = bundle.sprites.subarray(idx * size * size * 4, (idx + 1) * size * size * 4);
+      const x = (idx % SPRITE_SHEET_COLUMNS) * size;
+      const y = Math.floor(idx / SPRITE_SHEET_COLUMNS) * size;
+      ctx.putImageData(new ImageData(new Uint8ClampedArray(pixels), size, size), x, y);
+    }
+    bundle.sheet = sheet;
+  }
+  return bundle.sheet;
+}
+
+function currentCrop() {
+  if (cropper) {
+    const cropData = cropper.getData(true);
+    return {
+      x: Math.round(cropData.x),
+      y: Math.round(cropData.y),
+      w: Math.round(cropData.width),
+      h: Math.round(cropData.height),
+    };
+  }
+  return {
+    x: 0,
+    y: 0,
+    w: lastImageSize.width || cropImage.naturalWidth || 0,
+    h: lastImageSize.height || cropImage.naturalHeight || 0,
+  };
+}
+
+function currentSettings() {
+  return {
+    max_dim: Number(maxDimEl.value) || 120,
+    grid_w: gridWEl.value ? Number(gridWEl.value) : null,
+    grid_h: gridHEl.value ? Number(gridHEl.value) : null,
+    lock_aspect: lockAspectEl.checked,
+    dithering: ditheringEl.checked,
+    deterministic: deterministicEl.checked,
+    metric: metricEl.value,
+    bg_mode: bgModeEl.value,
+    bg_color: bgColorEl.value,
+    weights: {
+      color: Number(weightColorEl.value) || 1.0,
+      edge: Number(weightEdgeEl.value) || 0.2,
+      alpha: Number(weightAlphaEl.value) || 0.1,
+    },
+  };
+}
+
+// Match and draw the preview in the browser; the server is only needed for exports.
+async function renderLocalPreview() {
+  if (!imageReady || typeof EmojiMatcher === 'undefined') {
+    return;
+  }
+  const crop = currentCrop();
+  if (!crop.w || !crop.h) {
+    return;
+  }
+  let bundle;
+  try {
+    bundle = await loadBundle();
+  } catch (err) {
+    console.warn('Local preview unavailable.', err);
+    return;
+  }
+  const settings = currentSettings();
+  const { gridW, gridH } = EmojiMatcher.computeGridSize(
+    crop.w,
+    crop.h,
+    settings.max_dim,
+    settings.grid_w,
+    settings.grid_h,
+  );
+
+  const sampleCanvas = document.createElement('canvas');
+  sampleCanvas.width = gridW * SAMPLE;
+  sampleCanvas.height = gridH * SAMPLE;
+  const sampleCtx = sampleCanvas.getContext('2d', { willReadFrequently: true });
+  sampleCtx.imageSmoothingQuality = 'high';
+  sampleCtx.drawImage(cropImage, crop.x, crop.y, crop.w, crop.h, 0, 0, sampleCanvas.width, sampleCanvas.height);
+  const rgba = sampleCtx.getImageData(0, 0, sampleCanvas.width, sampleCanvas.height).data;
+
+  const features = EmojiMatcher.computeGridFeatures(rgba, gridW, gridH, SAMPLE);
+  const indices = EmojiMatcher.matchFeatures(features, bundle.features, { ...settings.weights, metric: settings.metric });
+
+  const size = bundle.spriteSize;
+  const sheet = spriteSheet(bundle);
+  const canvas = document.createElement('canvas');
+  canvas.width = gridW * size;
+  canvas.height = gridH * size;
+  const ctx = canvas.getContext('2d');
+  if (settings.bg_mode === 'solid') {
+    ctx.fillStyle = settings.bg_color;
+    ctx.fillRect(0, 0, canvas.width, canvas.height);
+  }
+  indices.forEach((idx, cell) => {
+    const sx = (idx % SPRITE_SHEET_COLUMNS) * size;
+    const sy = Math.floor(idx / SPRITE_SHEET_COLUMNS) * size;
+    ctx.drawImage(sheet, sx, sy, size, size, (cell % gridW) * size, Math.floor(cell / gridW) * size, size, size);
+  });
+  gridInfo.textContent = `${gridW} × ${gridH}`;
+  updatePreview(canvas.toDataURL('image/png'));
+}
+
+function schedulePreview() {
+  lastHash = null;
+  hashInfo.textContent = '—';
+  clearTimeout(previewTimer);
+  previewTimer = setTimeout(renderLocalPreview, 150);
+}
+
 function setExportState(enabled) {
   exportTextBtn.disabled = !enabled;
   exportTextSpacedBtn.disabled = !enabled;
   exportPngBtn.disabled = !enabled;
+  exportSvgBtn.disabled = !enabled;
   exportJpgBtn.disabled = !enabled;
 }
 
@@ -81,6 +225,8 @@ fileInput.addEventListener('change', () => {
     if (cropper) {
       cropper.destroy();
     }
+    setExportState(true);
+    schedulePreview();
     if (typeof Cropper === 'undefined') {
       cropper = null;
       console.warn('Cropper.js is not available; falling back to full-image crop.');
@@ -93,6 +239,7 @@ fileInput.addEventListener('change', () => {
         autoCropArea: 0.9,
         background: false,
         responsive: true,
+        crop: schedulePreview,
       });
     } catch (err) {
       cropper = null;
@@ -102,63 +249,34 @@ fileInput.addEventListener('change', () => {
   };
 });
 
-convertBtn.addEventListener('click', async () => {
+[maxDimEl, gridWEl, gridHEl, lockAspectEl, metricEl, bgModeEl, bgColorEl, weightColorEl, weightEdgeEl, weightAlphaEl]
+  .forEach((el) => el.addEventListener('input', schedulePreview));
+[deterministicEl, ditheringEl].forEach((el) => el.addEventListener('change', () => {
+  lastHash = null;
+  hashInfo.textContent = '—';
+}));
+
+async function convert() {
   const file = fileInput.files[0];
   if (!file) {
     setStatus('Upload an image first.');
-    return;
+    return null;
   }
   if (!imageReady) {
     setStatus('Image still loading. Try again in a moment.');
-    return;
+    return null;
   }
 
   setStatus('Converting…');
   setWarnings([]);
-  setExportState(false);
-
-  let cropPayload;
-  if (cropper) {
-    const cropData = cropper.getData(true);
-    cropPayload = {
-      x: Math.round(cropData.x),
-      y: Math.round(cropData.y),
-      w: Math.round(cropData.width),
-      h: Math.round(cropData.height),
-    };
-  } else {
-    console.info('Using full-image crop because cropper is unavailable.');
-    cropPayload = {
-      x: 0,
-      y: 0,
-      w: lastImageSize.width || cropImage.naturalWidth || 0,
-      h: lastImageSize.height || cropImage.naturalHeight || 0,
-    };
-  }
-
-  const settingsPayload = {
-    max_dim: Number(maxDimEl.value) || 120,
-    grid_w: gridWEl.value ? Number(gridWEl.value) : null,
-    grid_h: gridHEl.value ? Number(gridHEl.value) : null,
-    lock_aspect: lockAspectEl.checked,
-    dithering: ditheringEl.checked,
-    deterministic: deterministicEl.checked,
-    bg_mode: bgModeEl.value,
-    bg_color: bgColorEl.value,
-    weights: {
-      color: Number(weightColorEl.value) || 1.0,
-      edge: Number(weightEdgeEl.value) || 0.2,
-      alpha: Number(weightAlphaEl.value) || 0.1,
-    },
-  };
 
   const formData = new FormData();
   formData.append('file', file);
-  formData.append('crop', JSON.stringify(cropPayload));
-  formData.append('settings', JSON.stringify(settingsPayload));
+  formData.append('crop', JSON.stringify(currentCrop()));
+  formData.append('settings', JSON.stringify(currentSettings()));
 
   try {
-    const response = await fetch('/api/convert', {
+    const response = await fetch('/api/convert?fields=grid_w,grid_h,preview_url,hash,warnings', {
       method: 'POST',
       body: formData,
     });
@@ -173,34 +291,46 @@ convertBtn.addEventListener('click', async () => {
     gridInfo.textContent = `${data.grid_w} × ${data.grid_h}`;
     hashInfo.textContent = data.hash;
     setWarnings(data.warnings || []);
-    updatePreview(data.preview_png_base64);
-    setExportState(true);
+    updatePreview(data.preview_url);
     setStatus('Ready to export.');
+    return lastHash;
   } catch (err) {
     setStatus(err.message || 'Conversion failed.');
-    setExportState(false);
+    return null;
   }
-});
+}
 
-exportTextBtn.addEventListener('click', () => {
-  if (!lastHash) return;
-  window.location.href = `/api/export/text?hash=${encodeURIComponent(lastHash)}&spaced=0`;
-});
+// Exports need the server-side conversion; run it only when one is actually requested.
+async function withHash(download) {
+  const hash = lastHash || (await convert());
+  if (hash) {
+    download(encodeURIComponent(hash));
+  }
+}
 
-exportTextSpacedBtn.addEventListener('click', () => {
-  if (!lastHash) return;
-  window.location.href = `/api/export/text?hash=${encodeURIComponent(lastHash)}&spaced=1`;
-});
+convertBtn.addEventListener('click', convert);
+
+exportTextBtn.addEventListener('click', () => withHash((hash) => {
+  window.location.href = `/api/export/text?hash=${hash}&spaced=0`;
+}));
 
-exportPngBtn.addEventListener('click', () => {
-  if (!lastHash) return;
+exportTextSpacedBtn.addEventListener('click', () => withHash((hash) => {
+  window.location.href = `/api/export/text?hash=${hash}&spaced=1`;
+}));
+
+exportPngBtn.addEventListener('click', () => withHash((hash) => {
   const bg = bgModeEl.value;
   const color = encodeURIComponent(bgColorEl.value);
-  window.location.href = `/api/export/png?hash=${encodeURIComponent(lastHash)}&bg=${bg}&color=${color}`;
-});
+  window.location.href = `/api/export/png?hash=${hash}&bg=${bg}&color=${color}`;
+}));
+
+exportSvgBtn.addEventListener('click', () => withHash((hash) => {
+  const bg = bgModeEl.value;
+  const color = encodeURIComponent(bgColorEl.value);
+  window.location.href = `/api/export/svg?hash=${hash}&bg=${bg}&color=${color}`;
+}));
 
-exportJpgBtn.addEventListener('click', () => {
-  if (!lastHash) return;
+exportJpgBtn.addEventListener('click', () => withHash((hash) => {
   const color = encodeURIComponent(bgColorEl.value);
-  window.location.href = `/api/export/jpg?hash=${encodeURIComponent(lastHash)}&color=${color}`;
-});
+  window.location.href = `/api/export/jpg?hash=${hash}&color=${color}`;
+}));
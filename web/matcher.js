@@ -0,0 +1,304 @@
+/*
+ * Client-side port of app/core/features.compute_grid_features, app/core/matcher.match_features
+ * and app/core/preprocess.compute_grid_size, used for instant local previews.
+ * tests/unit/test_client_parity.py keeps it in step with the server implementation.
+ */
+(function (root, factory) {
+  if (typeof module === 'object' && module.exports) {
+    module.exports = factory();
+  } else {
+    root.EmojiMatcher = factory();
+  }
+})(typeof self !== 'undefined' ? self : this, () => {
+  const BUNDLE_MAGIC = 'EMJB';
+  const BUNDLE_FORMAT = 1;
+  const RERANK_CANDIDATES = 16;
+  const EPSILON = 1e-6;
+
+  function parseBundle(buffer) {
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+    if (magic !== BUNDLE_MAGIC) {
+      throw new Error('Not an emoji bundle');
+    }
+    const format = view.getUint32(4, true);
+    if (format !== BUNDLE_FORMAT) {
+      throw new Error(`Unsupported bundle format ${format}`);
+    }
+    const headerLength = view.getUint32(8, true);
+    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 12, headerLength)));
+    const dataStart = 12 + headerLength + ((4 - ((12 + headerLength) % 4)) % 4);
+    const [featuresOffset, featuresLength] = header.sections.features;
+    const [spritesOffset, spritesLength] = header.sections.sprites;
+    return {
+      version: header.version,
+      count: header.count,
+      featureDims: header.feature_dims,
+      spriteSize: header.sprite_size,
+      emojiList: header.emoji_list,
+      features: new Float32Array(buffer, dataStart + featuresOffset, featuresLength / 4),
+      sprites: new Uint8ClampedArray(buffer, dataStart + spritesOffset, spritesLength),
+    };
+  }
+
+  // Python's round() rounds halves to even; Math.round would not.
+  function roundHalfEven(value) {
+    const floor = Math.floor(value);
+    const diff = value - floor;
+    if (diff > 0.5) return floor + 1;
+    if (diff < 0.5) return floor;
+    return floor % 2 === 0 ? floor : floor + 1;
+  }
+
+  function computeGridSize(width, height, maxDim, gridW, gridH, hardCap = 120) {
+    maxDim = Math.min(maxDim, hardCap);
+    const clamp = (value) => Math.min(Math.max(value, 1), maxDim);
+    if (gridW == null && gridH == null) {
+      if (width >= height) {
+        gridW = maxDim;
+        gridH = Math.max(1, roundHalfEven((height / width) * gridW));
+      } else {
+        gridH = maxDim;
+        gridW = Math.max(1, roundHalfEven((width / height) * gridH));
+      }
+    } else {
+      if (gridW != null) gridW = clamp(gridW);
+      if (gridH != null) gridH = clamp(gridH);
+      if (gridW == null) {
+        gridW = Math.max(1, roundHalfEven((width / height) * gridH));
+      } else if (gridH == null) {
+        gridH = Math.max(1, roundHalfEven((height / width) * gridW));
+      }
+    }
+    return { gridW: Math.min(gridW, maxDim), gridH: Math.min(gridH, maxDim) };
+  }
+
+  function srgbToLab(r, g, b) {
+    const linear = (c) => (c > 0.04045 ? ((c + 0.055) / 1.055) ** 2.4 : c / 12.92);
+    const rl = linear(r);
+    const gl = linear(g);
+    const bl = linear(b);
+    const x = (0.4124564 * rl + 0.3575761 * gl + 0.1804375 * bl) / 0.95047;
+    const y = 0.2126729 * rl + 0.7151522 * gl + 0.072175 * bl;
+    const z = (0.0193339 * rl + 0.119192 * gl + 0.9503041 * bl) / 1.08883;
+    const epsilon = 216 / 24389;
+    const kappa = 24389 / 27;
+    const f = (t) => (t > epsilon ? Math.cbrt(t) : (kappa * t + 16) / 116);
+    const fx = f(x);
+    const fy = f(y);
+    const fz = f(z);
+    return [116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)];
+  }
+
+  /*
+   * Features for an RGBA buffer already sampled to (gridW * sample) x (gridH * sample).
+   * Returns a Float32Array of gridW * gridH rows of [L, a, b, edge, alpha].
+   */
+  function computeGridFeatures(rgba, gridW, gridH, sample = 4) {
+    const width = gridW * sample;
+    const height = gridH * sample;
+    const pixels = width * height;
+    const lab = new Float64Array(pixels * 3);
+    const luma = new Float64Array(pixels);
+    const opaque = new Uint8Array(pixels);
+    for (let p = 0; p < pixels; p += 1) {
+      const r = rgba[p * 4] / 255;
+      const g = rgba[p * 4 + 1] / 255;
+      const b = rgba[p * 4 + 2] / 255;
+      const [l, a, bb] = srgbToLab(r, g, b);
+      lab[p * 3] = l;
+      lab[p * 3 + 1] = a;
+      lab[p * 3 + 2] = bb;
+      luma[p] = 0.2126 * r + 0.7152 * g + 0.0722 * b;
+      opaque[p] = rgba[p * 4 + 3] / 255 > 0.1 ? 1 : 0;
+    }
+
+    const at = (x, y) => luma[Math.min(Math.max(y, 0), height - 1) * width + Math.min(Math.max(x, 0), width - 1)];
+    const features = new Float32Array(gridW * gridH * 5);
+    const area = sample * sample;
+    for (let cy = 0; cy < gridH; cy += 1) {
+      for (let cx = 0; cx < gridW; cx += 1) {
+        let l = 0;
+        let a = 0;
+        let b = 0;
+        let edge = 0;
+        let alpha = 0;
+        for (let y = cy * sample; y < (cy + 1) * sample; y += 1) {
+          for (let x = cx * sample; x < (cx + 1) * sample; x += 1) {
+            const p = y * width + x;
+            l += lab[p * 3];
+            a += lab[p * 3 + 1];
+            b += lab[p * 3 + 2];
+            alpha += opaque[p];
+            const gx =
+              at(x - 1, y - 1) + 2 * at(x - 1, y) + at(x - 1, y + 1) -
+              at(x + 1, y - 1) - 2 * at(x + 1, y) - at(x + 1, y + 1);
+            const gy =
+              at(x - 1, y - 1) + 2 * at(x, y - 1) + at(x + 1, y - 1) -
+              at(x - 1, y + 1) - 2 * at(x, y + 1) - at(x + 1, y + 1);
+            edge += Math.sqrt(gx * gx + gy * gy);
+          }
+        }
+        const offset = (cy * gridW + cx) * 5;
+        features[offset] = l / area;
+        features[offset + 1] = a / area;
+        features[offset + 2] = b / area;
+        features[offset + 3] = edge / area;
+        features[offset + 4] = alpha / area;
+      }
+    }
+    return features;
+  }
+
+  function ciede2000(l1, a1, b1, l2, a2, b2) {
+    const rad = Math.PI / 180;
+    const cBar = (Math.hypot(a1, b1) + Math.hypot(a2, b2)) / 2;
+    const cBar7 = cBar ** 7;
+    const g = 0.5 * (1 - Math.sqrt(cBar7 / (cBar7 + 25 ** 7)));
+    const a1p = (1 + g) * a1;
+    const a2p = (1 + g) * a2;
+    const c1p = Math.hypot(a1p, b1);
+    const c2p = Math.hypot(a2p, b2);
+    const hue = (b, a) => ((Math.atan2(b, a) / rad) % 360 + 360) % 360;
+    const h1p = hue(b1, a1p);
+    const h2p = hue(b2, a2p);
+    const achromatic = c1p * c2p === 0;
+
+    const dLp = l2 - l1;
+    const dCp = c2p - c1p;
+    let dhp = h2p - h1p;
+    if (dhp > 180) dhp -= 360;
+    if (dhp < -180) dhp += 360;
+    if (achromatic) dhp = 0;
+    const dHp = 2 * Math.sqrt(c1p * c2p) * Math.sin((dhp / 2) * rad);
+
+    const lpBar = (l1 + l2) / 2;
+    const cpBar = (c1p + c2p) / 2;
+    const hpSum = h1p + h2p;
+    let hpBar;
+    if (achromatic) hpBar = hpSum;
+    else if (Math.abs(h1p - h2p) <= 180) hpBar = hpSum / 2;
+    else hpBar = hpSum < 360 ? (hpSum + 360) / 2 : (hpSum - 360) / 2;
+
+    const t =
+      1 -
+      0.17 * Math.cos((hpBar - 30) * rad) +
+      0.24 * Math.cos(2 * hpBar * rad) +
+      0.32 * Math.cos((3 * hpBar + 6) * rad) -
+      0.2 * Math.cos((4 * hpBar - 63) * rad);
+    const dTheta = 30 * Math.exp(-(((hpBar - 275) / 25) ** 2));
+    const cpBar7 = cpBar ** 7;
+    const rC = 2 * Math.sqrt(cpBar7 / (cpBar7 + 25 ** 7));
+    const lOffset = (lpBar - 50) ** 2;
+    const sL = 1 + (0.015 * lOffset) / Math.sqrt(20 + lOffset);
+    const sC = 1 + 0.045 * cpBar;
+    const sH = 1 + 0.015 * cpBar * t;
+    const rT = -Math.sin(2 * dTheta * rad) * rC;
+    const termL = dLp / sL;
+    const termC = dCp / sC;
+    const termH = dHp / sH;
+    return Math.sqrt(termL * termL + termC * termC + termH * termH + rT * termC * termH);
+  }
+
+  function quantizeKey(features, offset) {
+    return [
+      roundHalfEven(features[offset] / 2),
+      roundHalfEven(features[offset + 1] / 2),
+      roundHalfEven(features[offset + 2] / 2),
+      roundHalfEven(features[offset + 3] * 100),
+      roundHalfEven(features[offset + 4] * 100),
+    ].join(':');
+  }
+
+  // Lowest index within EPSILON of the minimum, like the server's non-random tie-break.
+  function pickLowest(distances, count) {
+    let min = Infinity;
+    for (let i = 0; i < count; i += 1) {
+      if (distances[i] < min) min = distances[i];
+    }
+    for (let i = 0; i < count; i += 1) {
+      if (distances[i] <= min + EPSILON) return i;
+    }
+    return 0;
+  }
+
+  // Indices of the k smallest distances, without sorting the whole array.
+  function nearest(distances, count, k) {
+    const best = [];
+    for (let e = 0; e < count; e += 1) {
+      const d = distances[e];
+      if (best.length === k && d >= distances[best[k - 1]]) continue;
+      let pos = best.length === k ? k - 1 : best.length;
+      while (pos > 0 && distances[best[pos - 1]] > d) {
+        best[pos] = best[pos - 1];
+        pos -= 1;
+      }
+      best[pos] = e;
+    }
+    return best;
+  }
+
+  /*
+   * Match cell features against bundle features. `weights` is {color, edge, alpha, metric}.
+   * With `memo` set, cells quantizing to the same key reuse one match, as the server does.
+   */
+  function matchFeatures(cellFeatures, emojiFeatures, weights, memo = true) {
+    const count = emojiFeatures.length / 5;
+    const cells = cellFeatures.length / 5;
+    const perceptual = weights.metric === 'ciede2000';
+    const indices = new Int32Array(cells);
+    const distances = new Float64Array(count);
+    const shortlistSize = Math.min(RERANK_CANDIDATES, count);
+    const cache = memo ? new Map() : null;
+
+    for (let cell = 0; cell < cells; cell += 1) {
+      const t = cell * 5;
+      const key = cache ? quantizeKey(cellFeatures, t) : null;
+      if (cache && cache.has(key)) {
+        indices[cell] = cache.get(key);
+        continue;
+      }
+      for (let e = 0; e < count; e += 1) {
+        const f = e * 5;
+        const dl = emojiFeatures[f] - cellFeatures[t];
+        const da = emojiFeatures[f + 1] - cellFeatures[t + 1];
+        const db = emojiFeatures[f + 2] - cellFeatures[t + 2];
+        const de = emojiFeatures[f + 3] - cellFeatures[t + 3];
+        const dAlpha = emojiFeatures[f + 4] - cellFeatures[t + 4];
+        distances[e] =
+          weights.color * (dl * dl + da * da + db * db) + weights.edge * de * de + weights.alpha * dAlpha * dAlpha;
+      }
+
+      let choice;
+      if (perceptual) {
+        const shortlist = nearest(distances, count, shortlistSize).sort((x, y) => x - y);
+        const reranked = new Float64Array(shortlist.length);
+        shortlist.forEach((e, i) => {
+          const f = e * 5;
+          const color = ciede2000(
+            emojiFeatures[f], emojiFeatures[f + 1], emojiFeatures[f + 2],
+            cellFeatures[t], cellFeatures[t + 1], cellFeatures[t + 2],
+          );
+          const de = emojiFeatures[f + 3] - cellFeatures[t + 3];
+          const dAlpha = emojiFeatures[f + 4] - cellFeatures[t + 4];
+          reranked[i] = weights.color * color * color + weights.edge * de * de + weights.alpha * dAlpha * dAlpha;
+        });
+        choice = shortlist[pickLowest(reranked, reranked.length)];
+      } else {
+        choice = pickLowest(distances, count);
+      }
+      indices[cell] = choice;
+      if (cache) cache.set(key, choice);
+    }
+    return indices;
+  }
+
+  return {
+    BUNDLE_FORMAT,
+    parseBundle,
+    computeGridSize,
+    computeGridFeatures,
+    matchFeatures,
+    ciede2000,
+  };
+});